@@ -0,0 +1,54 @@
+"""usage counters on groups and users
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("photos", sa.Column("size_bytes", sa.BigInteger(), nullable=False, server_default="0"))
+
+    op.add_column("groups", sa.Column("photo_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("groups", sa.Column("bytes_used", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("groups", sa.Column("member_count", sa.Integer(), nullable=False, server_default="0"))
+
+    op.add_column("users", sa.Column("photo_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("bytes_used", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("group_count", sa.Integer(), nullable=False, server_default="0"))
+
+    # Seed the counters from existing rows (bytes_used starts at 0 for photos uploaded before size_bytes existed)
+    op.execute("""
+        UPDATE groups SET
+            photo_count = (SELECT COUNT(*) FROM photos WHERE photos.group_id = groups.id),
+            member_count = (SELECT COUNT(*) FROM user_groups WHERE user_groups.group_id = groups.id)
+    """)
+    op.execute("""
+        UPDATE users SET
+            photo_count = (SELECT COUNT(*) FROM photos WHERE photos.user_id = users.id),
+            group_count = (SELECT COUNT(*) FROM user_groups WHERE user_groups.user_id = users.id)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column("users", "group_count")
+    op.drop_column("users", "bytes_used")
+    op.drop_column("users", "photo_count")
+
+    op.drop_column("groups", "member_count")
+    op.drop_column("groups", "bytes_used")
+    op.drop_column("groups", "photo_count")
+
+    op.drop_column("photos", "size_bytes")
@@ -0,0 +1,41 @@
+"""resumable upload sessions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_sessions",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("object_name", sa.String(), nullable=True),
+        sa.Column("multipart_upload_id", sa.String(), nullable=True),
+        sa.Column("upload_length", sa.BigInteger(), nullable=False),
+        sa.Column("upload_offset", sa.BigInteger(), nullable=False),
+        sa.Column("parts", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=True),
+    )
+    op.create_index("ix_upload_sessions_expires_at", "upload_sessions", ["expires_at"])
+    op.create_index("ix_upload_sessions_user_id", "upload_sessions", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("upload_sessions")
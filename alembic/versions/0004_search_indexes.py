@@ -0,0 +1,52 @@
+"""unique group names and trigram search indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # Names created before the unique index may collide: keep the oldest, suffix the others with their id
+    op.execute("""
+        UPDATE groups g SET name = g.name || ' (' || g.id || ')'
+        WHERE EXISTS (SELECT 1 FROM groups o WHERE o.name = g.name AND o.id < g.id)
+    """)
+
+    # Built concurrently so large tables stay writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index("ix_groups_name", "groups", ["name"], unique=True, postgresql_concurrently=True)
+        op.create_index(
+            "ix_groups_name_trgm", "groups", ["name"],
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}, postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_groups_description_trgm", "groups", ["description"],
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}, postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_photos_group_id_name_trgm", "photos", ["group_id", "name"],
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_photos_group_id_name_trgm", table_name="photos")
+    op.drop_index("ix_groups_description_trgm", table_name="groups")
+    op.drop_index("ix_groups_name_trgm", table_name="groups")
+    op.drop_index("ix_groups_name", table_name="groups")
@@ -0,0 +1,39 @@
+"""photo storage keys
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows keep their file_path URL until app.commands.migrate_storage_keys moves their objects
+    op.add_column("photos", sa.Column("storage_key", sa.String(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_photos_storage_key", "photos", ["storage_key"], unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    # The objects stay under their new keys, only the URL is written back
+    op.execute(
+        sa.text("UPDATE photos SET file_path = :url_prefix || storage_key WHERE storage_key IS NOT NULL").bindparams(
+            url_prefix=f"{settings.minio_endpoint}/{settings.minio_bucket_name}/"
+        )
+    )
+    op.drop_index("ix_photos_storage_key", table_name="photos")
+    op.drop_column("photos", "storage_key")
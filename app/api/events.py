@@ -0,0 +1,74 @@
+import orjson
+from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.security import oauth2_scheme
+from app.crud.users import get_current_user
+from app.models.user import user_groups
+from app.services.notifications import event_hub
+
+router = APIRouter(
+    tags=["events"]
+)
+
+# Resolve the user and their groups with a short-lived session, so an open stream never holds a pooled connection
+def _load_subscription(token: str):
+    with Session(engine) as db:
+        current_user = get_current_user(db, token)
+        group_ids = [
+            row.group_id
+            for row in db.query(user_groups.c.group_id).filter(user_groups.c.user_id == current_user['id'])
+        ]
+    return current_user['id'], group_ids
+
+# Server-Sent Events stream of the current user's group events
+@router.get("/stream")
+async def stream_events(request: Request, token: str = Depends(oauth2_scheme)):
+    user_id, group_ids = await run_in_threadpool(_load_subscription, token)
+    subscriber = event_hub.subscribe(user_id, group_ids)
+
+    async def event_stream():
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await subscriber.next_event(settings.events_keepalive_seconds)
+                if event is None:
+                    yield b": keepalive\n\n"  # Comment line, ignored by clients
+                else:
+                    yield b"event: " + event["t"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+# WebSocket stream of the current user's group events (browsers cannot set headers, so the token is a query parameter)
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: str):
+    try:
+        user_id, group_ids = await run_in_threadpool(_load_subscription, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = event_hub.subscribe(user_id, group_ids)
+    try:
+        while True:
+            event = await subscriber.next_event(settings.events_keepalive_seconds)
+            if event is None:
+                await websocket.send_text('{"t":"ping"}')  # Keepalive, also detects dead connections
+            else:
+                await websocket.send_text(orjson.dumps(event).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_hub.unsubscribe(subscriber)
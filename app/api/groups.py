@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.core.database import get_session
+from app.core.database import get_session, get_read_session
 from app.models.group import Group
 from app.models.user import User
-from app.schemas.group import GroupCreate, GroupResponse
+from app.schemas.group import GroupCreate, GroupResponse, GroupUsage, GroupSearchPage
 from app.crud.groups import create_group, get_group_by_id, invite_user_to_group, remove_user_from_group
-from app.crud.users import get_user_by_id, get_current_user
+from app.crud.users import get_user_by_id, get_user_in_group, get_current_user
+from app.crud.search import search_groups
+from app.core.config import settings
+from app.core.responses import ORJSONResponse, page_response
 from app.core.security import oauth2_scheme
 
 router = APIRouter(
@@ -23,12 +27,41 @@ def create_new_group(group: GroupCreate, db: Session = Depends(get_session), tok
     new_group = create_group(db, group=group, admin_id=admin_id)
     return new_group
 
+# Search the current user's groups by name and description (declared before /{group_id} so it is matched first)
+@router.get("/search", response_model=GroupSearchPage, response_class=ORJSONResponse)
+def search_groups_endpoint(
+    q: str = Query(..., min_length=2),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_session),
+    token: str = Depends(oauth2_scheme)
+):
+    current_user = get_current_user(db, token)
+    groups, next_cursor = search_groups(db, current_user['id'], q, limit, cursor)
+    return page_response(groups, next_cursor)
+
 # Get group by ID
 @router.get("/{group_id}", response_model=GroupResponse)
-def get_group(group_id: int, db: Session = Depends(get_session)):
+def get_group(group_id: int, db: Session = Depends(get_read_session)):
     group = get_group_by_id(db, group_id)
     return group
 
+# Get photo, storage and membership usage of a group
+@router.get("/{group_id}/usage", response_model=GroupUsage)
+def get_group_usage(group_id: int, db: Session = Depends(get_read_session), token: str = Depends(oauth2_scheme)):
+    current_user = get_current_user(db, token)
+    if not get_user_in_group(db, current_user['id'], group_id):
+        raise HTTPException(status_code=403, detail="You are not a member of this group.")
+
+    group = get_group_by_id(db, group_id)
+    return GroupUsage(
+        group_id=group.id,
+        photo_count=group.photo_count,
+        bytes_used=group.bytes_used,
+        member_count=group.member_count,
+        quota_bytes=settings.group_quota_bytes
+    )
+
 # Invite a user to a group
 @router.post("/{group_id}/invite", status_code=status.HTTP_200_OK)
 def invite_user_to_group_route(group_id: int, email: str, db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
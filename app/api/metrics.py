@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from app.core.database import engine, replica_pool, pool_status
+
+router = APIRouter(
+    tags=["metrics"]
+)
+
+# Connection pool usage for the primary and every read replica
+@router.get("/db-pool")
+def get_db_pool_metrics():
+    return {
+        "primary": pool_status(engine),
+        "replicas": replica_pool.status(),
+    }
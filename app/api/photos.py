@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, Query, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.schemas.photo import PhotoUpload, PhotoResponse
+from app.schemas.photo import PhotoUpload, PhotoResponse, PhotoSearchPage
 from app.crud.photos import upload_photo, get_user_photos, get_group_photos, delete_photo
-from app.core.database import get_session
+from app.crud.search import search_photos
+from app.core.database import get_session, get_read_session
 from app.core.security import oauth2_scheme
+from app.core.responses import ORJSONResponse, rows_response, page_response
 from app.models.user import User
 from app.models.photo import Photo
 from app.models.group import Group
@@ -34,19 +36,19 @@ async def upload_photo_endpoint(
         raise HTTPException(status_code=400, detail=str(e))
 
 # Get photos uploaded by the current user
-@router.get("/", response_model=List[PhotoResponse])
+@router.get("/", response_model=List[PhotoResponse], response_class=ORJSONResponse)
 def get_user_photos_endpoint(
-    db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
+    db: Session = Depends(get_read_session), token: str = Depends(oauth2_scheme)
 ):
     current_user = get_current_user(db, token)
     
     photos = get_user_photos(db, current_user['id'])
-    return photos
+    return rows_response(photos)
 
 # Get photos in a group
-@router.get("/group/{group_id}", response_model=List[PhotoResponse])
+@router.get("/group/{group_id}", response_model=List[PhotoResponse], response_class=ORJSONResponse)
 def get_group_photos_endpoint(
-    group_id: int, db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
+    group_id: int, db: Session = Depends(get_read_session), token: str = Depends(oauth2_scheme)
 ):
     current_user = get_current_user(db, token)
     # Check if user is part of the group
@@ -55,7 +57,21 @@ def get_group_photos_endpoint(
         raise HTTPException(status_code=403, detail="You are not a member of this group.")
     
     photos = get_group_photos(db, group_id)
-    return photos
+    return rows_response(photos)
+
+# Search photo names in the current user's groups, optionally within one group
+@router.get("/search", response_model=PhotoSearchPage, response_class=ORJSONResponse)
+def search_photos_endpoint(
+    q: str = Query(..., min_length=2),
+    group_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_session),
+    token: str = Depends(oauth2_scheme)
+):
+    current_user = get_current_user(db, token)
+    photos, next_cursor = search_photos(db, current_user['id'], q, limit, cursor, group_id)
+    return page_response(photos, next_cursor)
 
 # Delete a photo
 @router.delete("/delete/{group_id}/{photo_id}")
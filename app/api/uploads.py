@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.schemas.photo import PhotoResponse
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+from app.crud.uploads import (
+    create_upload_session, get_upload_session, append_upload_chunk, finalize_upload_session, abort_upload_session
+)
+from app.crud.users import get_current_user
+from app.core.config import settings
+from app.core.database import get_session
+from app.core.security import oauth2_scheme
+
+router = APIRouter(
+    tags=["uploads"]
+)
+
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+def _offset_headers(upload) -> dict:
+    return {
+        "Upload-Offset": str(upload.upload_offset),
+        "Upload-Length": str(upload.upload_length),
+        "Cache-Control": "no-store",
+    }
+
+# Create a resumable upload session for a group
+@router.post("/{group_id}", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload_session_endpoint(
+    group_id: int,
+    upload: UploadSessionCreate,
+    response: Response,
+    db: Session = Depends(get_session),
+    token: str = Depends(oauth2_scheme)
+):
+    current_user = get_current_user(db, token)
+    upload_session = create_upload_session(db, current_user['id'], group_id, upload.name, upload.upload_length)
+    response.headers["Location"] = f"/uploads/{upload_session.id}"
+    return upload_session
+
+# Query the current offset of an upload session
+@router.head("/{upload_id}")
+def get_upload_offset_endpoint(upload_id: str, db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+    current_user = get_current_user(db, token)
+    upload_session = get_upload_session(db, upload_id, current_user['id'])
+    return Response(status_code=status.HTTP_200_OK, headers=_offset_headers(upload_session))
+
+# Get an upload session
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_session_endpoint(upload_id: str, db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+    current_user = get_current_user(db, token)
+    return get_upload_session(db, upload_id, current_user['id'])
+
+# Append a chunk at Upload-Offset
+@router.patch("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def append_upload_chunk_endpoint(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    content_type: str = Header(..., alias="Content-Type"),
+    content_length: int = Header(..., alias="Content-Length"),
+    db: Session = Depends(get_session),
+    token: str = Depends(oauth2_scheme)
+):
+    if content_type != CHUNK_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Chunks must be sent as {CHUNK_CONTENT_TYPE}"
+        )
+    if content_length > settings.upload_max_chunk_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Chunks may not exceed {settings.upload_max_chunk_bytes} bytes."
+        )
+
+    current_user = await run_in_threadpool(get_current_user, db, token)
+    data = await request.body()
+    upload_session = await run_in_threadpool(append_upload_chunk, db, upload_id, current_user['id'], upload_offset, data)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_offset_headers(upload_session))
+
+# Complete the upload and create the photo
+@router.post("/{upload_id}/finalize", response_model=PhotoResponse)
+def finalize_upload_session_endpoint(upload_id: str, db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+    current_user = get_current_user(db, token)
+    return finalize_upload_session(db, upload_id, current_user['id'])
+
+# Abort an upload session
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_upload_session_endpoint(upload_id: str, db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+    current_user = get_current_user(db, token)
+    abort_upload_session(db, get_upload_session(db, upload_id, current_user['id']))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
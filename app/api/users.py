@@ -6,17 +6,18 @@ from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
 from typing import List, Dict, Union, Optional
 
-from app.core.database import get_session
+from app.core.database import get_session, get_read_session
 from app.core.security import oauth2_scheme
 from app.models.user import User
 from app.models.group import Group
 from app.models.photo import Photo
-from app.schemas.user import UserBase, UserCreate, UserLogin, UserResponse, Token
+from app.schemas.user import UserBase, UserCreate, UserLogin, UserResponse, UserUsage, Token
 from app.schemas.group import GroupCreate, GroupResponse
 from app.schemas.photo import PhotoUpload, PhotoResponse
 from app.services.auth import hash_password, verify_password, create_access_token, decode_access_token
 from app.services.minio_client import upload_to_minio, get_minio_object_url, delete_from_minio
 from app.services.minio_status_codes import MinIOStatusCodes
+from app.core.config import settings
 from app.crud.users import create_user, get_user_by_id, get_user_by_email, get_users_in_group, authenticate_user, get_current_user
 
 router = APIRouter(
@@ -53,7 +54,20 @@ def login_user(user: UserLogin, db: Session = Depends(get_session)):
 
 # Get current user details
 @router.get("/me", response_model=UserResponse)
-def get_me(db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+def get_me(db: Session = Depends(get_read_session), token: str = Depends(oauth2_scheme)):
     current_user = get_current_user(db, token)
     db_user = get_user_by_email(db, email=current_user["email"])
-    return db_user
\ No newline at end of file
+    return db_user
+
+# Get photo, storage and membership usage of the current user
+@router.get("/me/usage", response_model=UserUsage)
+def get_my_usage(db: Session = Depends(get_read_session), token: str = Depends(oauth2_scheme)):
+    current_user = get_current_user(db, token)
+    db_user = get_user_by_id(db, current_user["id"])
+    return UserUsage(
+        user_id=db_user.id,
+        photo_count=db_user.photo_count,
+        bytes_used=db_user.bytes_used,
+        group_count=db_user.group_count,
+        quota_bytes=settings.user_quota_bytes
+    )
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Stream all photos (or one group's) out to a directory that bulk_import can read back.
+
+Rows are read with a server-side cursor and written to <out>/manifest.jsonl as
+they arrive, while a bounded pool of workers downloads the objects into
+<out>/<user_email>/<group_name>/<photo_id>_<name>. Files already present with
+the expected size are skipped, so an interrupted export can simply be re-run.
+
+Usage: python -m app.commands.bulk_export --out DIR [--group NAME] [--workers N]
+"""
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.storage import get_object_name_from_url
+from app.services.minio_client import minio_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keep user-supplied names from escaping their directory
+def _safe(name: str) -> str:
+    return name.replace(os.sep, "_").replace("..", "_") or "_"
+
+def stream_photos(group_name: str, batch_size: int):
+    query = """
+        SELECT p.id, p.name, p.storage_key, p.file_path, p.size_bytes, u.email AS user_email, u.name AS user_name, g.name AS group_name
+        FROM photos p
+        JOIN users u ON u.id = p.user_id
+        JOIN groups g ON g.id = p.group_id
+        WHERE (CAST(:group_name AS text) IS NULL OR g.name = :group_name)
+        ORDER BY p.id
+    """
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+            text(query), {"group_name": group_name}
+        )
+        yield from result
+
+def _download(object_name: str, path: str, size_bytes: int):
+    if os.path.exists(path) and (not size_bytes or os.path.getsize(path) == size_bytes):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    minio_client.fget_object(settings.minio_bucket_name, object_name, path)
+
+def export(out: str, group_name: str, workers: int, batch_size: int):
+    os.makedirs(out, exist_ok=True)
+    exported = failed = 0
+    pending = {}
+
+    def collect(finished):
+        nonlocal exported, failed
+        for future in finished:
+            photo_id = pending.pop(future)
+            try:
+                future.result()
+                exported += 1
+                if exported % batch_size == 0:
+                    logger.info(f"Exported {exported} photos ({failed} failed)")
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to export photo {photo_id}: {str(e)}")
+
+    with open(os.path.join(out, "manifest.jsonl"), "w", encoding="utf-8") as manifest, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        for row in stream_photos(group_name, batch_size):
+            object_name = row.storage_key or get_object_name_from_url(settings.minio_bucket_name, row.file_path)
+            if object_name is None:
+                logger.warning(f"Skipping photo {row.id}: unrecognized file path {row.file_path}")
+                continue
+            relative_path = os.path.join(_safe(row.user_email), _safe(row.group_name), f"{row.id}_{_safe(row.name)}")
+            manifest.write(json.dumps({
+                "user_email": row.user_email,
+                "user_name": row.user_name,
+                "group_name": row.group_name,
+                "file": relative_path,
+                "name": row.name,
+            }) + "\n")
+
+            pending[executor.submit(_download, object_name, os.path.join(out, relative_path), row.size_bytes)] = row.id
+            if len(pending) >= workers * 4:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+        collect(wait(pending).done)
+
+    logger.info(f"Export finished: {exported} photos exported, {failed} failed.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export photos with a manifest for bulk_import.")
+    parser.add_argument("--out", required=True, help="Output directory.")
+    parser.add_argument("--group", help="Only export this group.")
+    parser.add_argument("--workers", type=int, default=32, help="Parallel object downloads.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows fetched per round trip.")
+    args = parser.parse_args()
+    export(args.out, args.group, args.workers, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Bulk-import an existing photo archive.
+
+Input is either a manifest (CSV with a header row, or JSONL) with the fields
+user_email, user_name (optional), group_name, file and name (optional), or a
+directory tree laid out as <root>/<user_email>/<group_name>/<files...>. Manifest
+file paths are relative to the manifest's directory.
+
+Users, groups and memberships are loaded first with COPY into temporary tables
+and merged with INSERT ... SELECT, skipping rows that already exist. Imported
+users get an unusable password hash and have to reset it. The first user seen
+in a group becomes its admin. Group names are global, so if a manifest group
+already exists under an admin who is not part of the import, the import aborts
+and lists those groups instead of adding the imported users to them; pass
+--merge-existing to merge into them anyway.
+
+Photos are then uploaded by a bounded pool of workers while their rows are
+written with COPY in batches. Each batch's COPY and the manifest position it
+reaches (an import_checkpoints row keyed by the source path) commit in one
+transaction, so an interrupted import resumes exactly where it stopped without
+duplicating rows. Objects uploaded for a batch that never committed are left
+as orphans for app.commands.reconcile_storage.
+Files that fail to upload are logged to <source>.errors and skipped.
+Usage counters are rebuilt at the end.
+
+Usage: python -m app.commands.bulk_import (--manifest FILE | --directory DIR) [--merge-existing] [--workers N] [--batch-size N]
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.crud.usage import reconcile_counters
+from app.core.storage import build_storage_key
+from app.services.minio_client import minio_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stands in for a password hash: never matches, so imported users must reset their password
+UNUSABLE_PASSWORD = "!"
+
+# Yield (position, record) from a CSV or JSONL manifest
+def read_manifest(path: str):
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for position, record in enumerate(records, start=1):
+            record["file"] = os.path.join(base, record["file"])
+            yield position, record
+
+# Yield (position, record) from a <root>/<user_email>/<group_name>/... tree, in a stable order
+def read_directory(root: str):
+    position = 0
+    for user_email in sorted(os.listdir(root)):
+        user_dir = os.path.join(root, user_email)
+        if not os.path.isdir(user_dir):
+            continue
+        for group_name in sorted(os.listdir(user_dir)):
+            group_dir = os.path.join(user_dir, group_name)
+            if not os.path.isdir(group_dir):
+                continue
+            for dirpath, dirnames, filenames in os.walk(group_dir):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    position += 1
+                    yield position, {"user_email": user_email, "group_name": group_name, "file": os.path.join(dirpath, filename)}
+
+def _copy_rows(cursor, table: str, columns: str, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+# Create missing users, groups and memberships, returning email -> user id and group name -> group id
+def load_entities(records, merge_existing: bool = False):
+    users, groups, memberships = {}, {}, set()
+    for _, record in records:
+        email, group_name = record["user_email"], record["group_name"]
+        users.setdefault(email, record.get("user_name") or email.split("@")[0])
+        groups.setdefault(group_name, email)
+        memberships.add((email, group_name))
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE import_users (email text, name text) ON COMMIT DROP;
+            CREATE TEMP TABLE import_groups (name text, admin_email text) ON COMMIT DROP;
+            CREATE TEMP TABLE import_members (email text, group_name text) ON COMMIT DROP;
+        """)
+        _copy_rows(cursor, "import_users", "email, name", users.items())
+        _copy_rows(cursor, "import_groups", "name, admin_email", groups.items())
+        _copy_rows(cursor, "import_members", "email, group_name", memberships)
+        if not merge_existing:
+            # Groups that exist and are administered by someone outside this import belong to another tenant
+            cursor.execute("""
+                SELECT g.name
+                FROM import_groups ig
+                JOIN groups g ON g.name = ig.name
+                JOIN users a ON a.id = g.admin_id
+                WHERE a.email NOT IN (SELECT email FROM import_users)
+                ORDER BY g.name
+            """)
+            foreign_groups = [name for (name,) in cursor.fetchall()]
+            if foreign_groups:
+                logger.error(
+                    f"{len(foreign_groups)} groups in the import already exist under another admin: "
+                    f"{', '.join(foreign_groups)}. Rename them in the source or pass --merge-existing."
+                )
+                raise SystemExit(1)
+        cursor.execute("""
+            INSERT INTO users (email, name, hashed_password)
+            SELECT email, name, %s FROM import_users
+            ON CONFLICT (email) DO NOTHING
+        """, (UNUSABLE_PASSWORD,))
+        cursor.execute("""
+            INSERT INTO groups (name, admin_id)
+            SELECT ig.name, u.id
+            FROM import_groups ig JOIN users u ON u.email = ig.admin_email
+            ON CONFLICT (name) DO NOTHING
+        """)
+        cursor.execute("""
+            INSERT INTO user_groups (user_id, group_id)
+            SELECT u.id, g.id
+            FROM import_members m
+            JOIN users u ON u.email = m.email
+            JOIN groups g ON g.name = m.group_name
+            ON CONFLICT DO NOTHING
+        """)
+        cursor.execute("SELECT email, id FROM users WHERE email = ANY(%s)", (list(users),))
+        user_ids = dict(cursor.fetchall())
+        cursor.execute("SELECT name, id FROM groups WHERE name = ANY(%s)", (list(groups),))
+        group_ids = dict(cursor.fetchall())
+        connection.commit()
+    finally:
+        connection.close()
+
+    logger.info(f"Loaded {len(users)} users, {len(groups)} groups and {len(memberships)} memberships.")
+    return user_ids, group_ids
+
+
+class Checkpoint:
+    """Last manifest position whose photo row is committed, stored in the transaction that commits it."""
+
+    def __init__(self, source: str):
+        self.source = source
+        with engine.connect() as connection:
+            position = connection.execute(
+                text("SELECT position FROM import_checkpoints WHERE source = :source"), {"source": source}
+            ).scalar()
+        self.position = position or 0
+
+    # Record the position on the cursor's transaction; it takes effect when the caller commits
+    def save(self, cursor, position: int):
+        cursor.execute("""
+            INSERT INTO import_checkpoints (source, position, updated_at) VALUES (%s, %s, now())
+            ON CONFLICT (source) DO UPDATE SET position = EXCLUDED.position, updated_at = EXCLUDED.updated_at
+        """, (self.source, position))
+        self.position = position
+
+
+class PhotoImporter:
+    def __init__(self, user_ids: dict, group_ids: dict, checkpoint: Checkpoint, errors_path: str, workers: int, batch_size: int):
+        self.user_ids = user_ids
+        self.group_ids = group_ids
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.batch_size = batch_size
+        self.imported = 0
+        self.failed = 0
+        self._errors = open(errors_path, "a", encoding="utf-8")
+
+    # Upload one file and return its photo row (runs in a worker thread)
+    def _upload(self, record: dict, upload_time: str):
+        user_id = self.user_ids[record["user_email"]]
+        group_id = self.group_ids[record["group_name"]]
+        name = record.get("name") or os.path.basename(record["file"])
+        storage_key = build_storage_key(group_id, name)
+        minio_client.fput_object(
+            settings.minio_bucket_name, storage_key, record["file"], metadata={"x-amz-meta-ref-count": "1"}
+        )
+        return (name, storage_key, user_id, group_id, os.path.getsize(record["file"]), upload_time)
+
+    def run(self, records):
+        with engine.connect() as connection:
+            upload_time = connection.execute(text("SELECT now()::timestamp")).scalar().isoformat()
+
+        pending = {}  # future -> (position, record)
+        done = {}  # position -> photo row (None for a failed upload), waiting for earlier positions
+        # Bounds queued uploads plus the reorder buffer; must leave room for a full batch
+        window = max(self.workers * 4, self.batch_size * 2)
+        next_position = self.checkpoint.position + 1
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for position, record in records:
+                if position <= self.checkpoint.position:
+                    continue
+                pending[executor.submit(self._upload, record, upload_time)] = (position, record)
+                while pending and len(pending) + len(done) >= window:
+                    next_position = self._collect(pending, done, next_position, wait(pending, return_when=FIRST_COMPLETED).done)
+            while pending:
+                next_position = self._collect(pending, done, next_position, wait(pending).done)
+        self._flush(done, next_position, final=True)
+        self._errors.close()
+
+    def _collect(self, pending: dict, done: dict, next_position: int, finished) -> int:
+        for future in finished:
+            position, record = pending.pop(future)
+            try:
+                done[position] = future.result()
+            except Exception as e:
+                self.failed += 1
+                self._errors.write(json.dumps({"position": position, "file": record["file"], "error": str(e)}) + "\n")
+                done[position] = None
+        return self._flush(done, next_position)
+
+    # Write the contiguous run of finished positions once it fills a batch, then checkpoint it
+    def _flush(self, done: dict, next_position: int, final: bool = False) -> int:
+        end = next_position
+        while end in done:
+            end += 1
+        if end == next_position or (end - next_position < self.batch_size and not final):
+            return next_position
+
+        rows = [row for row in (done.pop(position) for position in range(next_position, end)) if row is not None]
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if rows:
+                _copy_rows(cursor, "photos", "name, storage_key, user_id, group_id, size_bytes, upload_time", rows)
+            self.checkpoint.save(cursor, end - 1)
+            connection.commit()
+        finally:
+            connection.close()
+        self.imported += len(rows)
+        logger.info(f"Imported {self.imported} photos ({self.failed} failed), checkpoint at {end - 1}")
+        return end
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import users, groups and photos.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="CSV or JSONL manifest.")
+    source.add_argument("--directory", help="Directory laid out as <user_email>/<group_name>/<files>.")
+    parser.add_argument("--merge-existing", action="store_true",
+                        help="Add imported users and photos to groups that already exist under another admin.")
+    parser.add_argument("--checkpoint", help="Checkpoint name (defaults to the absolute source path).")
+    parser.add_argument("--workers", type=int, default=32, help="Parallel object uploads.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Photo rows per COPY batch.")
+    args = parser.parse_args()
+
+    source_path = os.path.abspath(args.manifest or args.directory.rstrip(os.sep))
+    read = (lambda: read_manifest(args.manifest)) if args.manifest else (lambda: read_directory(args.directory))
+
+    user_ids, group_ids = load_entities(read(), args.merge_existing)
+    importer = PhotoImporter(
+        user_ids, group_ids, Checkpoint(args.checkpoint or source_path), f"{source_path}.errors", args.workers, args.batch_size
+    )
+    importer.run(read())
+
+    with Session(engine) as db:
+        reconcile_counters(db)
+    logger.info(f"Import finished: {importer.imported} photos imported, {importer.failed} failed.")
+
+if __name__ == "__main__":
+    main()
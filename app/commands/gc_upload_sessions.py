@@ -0,0 +1,28 @@
+"""
+Abort expired resumable upload sessions and their MinIO multipart uploads.
+
+A session is only removed once MinIO confirms its multipart upload is gone;
+sessions whose abort fails are retried by the next run.
+
+Usage: python -m app.commands.gc_upload_sessions
+"""
+import logging
+
+from sqlmodel import Session
+
+from app.core.database import engine
+from app.models import group, photo, user  # noqa: F401  (configure the relationships of UploadSession)
+from app.crud.uploads import expire_upload_sessions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    with Session(engine) as db:
+        removed, failed = expire_upload_sessions(db)
+    logger.info(f"Removed {removed} expired upload sessions.")
+    if failed:
+        logger.warning(f"{failed} expired upload sessions could not be aborted and are kept for the next run.")
+
+if __name__ == "__main__":
+    main()
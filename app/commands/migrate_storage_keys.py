@@ -0,0 +1,129 @@
+"""
+Move photos stored under the legacy flat object names to storage keys.
+
+Photos without a storage_key are walked in id order, in batches. For every
+batch the objects are copied server-side to their new key
+(groups/<group_id>/<shard>/<uuid>) by a pool of workers, the rows get their
+storage_key with one UPDATE, and only after that commits is the old object
+released (its ref count decremented, deleted once it reaches zero). Photos
+that shared one legacy object each get their own copy.
+
+The command can be stopped and re-run at any time. Copies whose rows were not
+updated, or legacy objects left behind by an interruption, show up as orphan
+objects in app.commands.reconcile_storage.
+
+Photos without a group, or whose file_path does not point into the bucket,
+are skipped and reported.
+
+Usage: python -m app.commands.migrate_storage_keys [--dry-run] [--workers N] [--batch-size N]
+"""
+import argparse
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.storage import build_storage_key, get_object_name_from_url
+from app.services.minio_client import copy_object_to, delete_from_minio, remove_objects_batch
+from app.services.minio_status_codes import MinIOStatusCodes
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StorageKeyMigration:
+    def __init__(self, workers: int, batch_size: int, dry_run: bool):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = {"migrated": 0, "failed": 0, "skipped": 0}
+
+    def run(self):
+        last_id = 0
+        with Session(engine) as db, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                rows = db.execute(text("""
+                    SELECT id, name, group_id, file_path FROM photos
+                    WHERE storage_key IS NULL AND id > :last_id
+                    ORDER BY id
+                    LIMIT :limit
+                """), {"last_id": last_id, "limit": self.batch_size}).all()
+                if not rows:
+                    return self.stats
+                last_id = rows[-1].id
+                self._migrate_batch(db, executor, rows)
+                logger.info(f"Up to photo {last_id}: {self.stats}")
+
+    def _migrate_batch(self, db: Session, executor: ThreadPoolExecutor, rows):
+        moves = []  # (photo_id, legacy object name, storage key)
+        for row in rows:
+            legacy_name = get_object_name_from_url(settings.minio_bucket_name, row.file_path)
+            if row.group_id is None or legacy_name is None:
+                self.stats["skipped"] += 1
+                logger.warning(f"Skipping photo {row.id}: group {row.group_id}, file path {row.file_path}")
+                continue
+            moves.append((row.id, legacy_name, build_storage_key(row.group_id, row.name)))
+        if self.dry_run:
+            self.stats["migrated"] += len(moves)
+            return
+
+        copied = []
+        for move, error in zip(moves, executor.map(self._copy, moves)):
+            if error:
+                self.stats["failed"] += 1
+                logger.error(f"Failed to copy photo {move[0]} from {move[1]}: {error}")
+            else:
+                copied.append(move)
+        if not copied:
+            return
+
+        # Rows deleted (or migrated by another run) in the meantime are not updated
+        updated = set(db.execute(text("""
+            UPDATE photos p SET storage_key = v.storage_key, file_path = NULL
+            FROM unnest(CAST(:ids AS integer[]), CAST(:keys AS text[])) AS v(id, storage_key)
+            WHERE p.id = v.id AND p.storage_key IS NULL
+            RETURNING p.id
+        """), {"ids": [move[0] for move in copied], "keys": [move[2] for move in copied]}).scalars())
+        db.commit()
+        self.stats["migrated"] += len(updated)
+
+        stale = [storage_key for photo_id, _, storage_key in copied if photo_id not in updated]
+        if stale:
+            remove_objects_batch(settings.minio_bucket_name, stale)
+        # One task per legacy object, so decrements of a shared object don't race each other
+        releases = Counter(legacy_name for photo_id, legacy_name, _ in copied if photo_id in updated)
+        list(executor.map(self._release, releases.items()))
+
+    @staticmethod
+    def _copy(move):
+        try:
+            copy_object_to(settings.minio_bucket_name, move[1], move[2])
+        except Exception as e:
+            return str(e)
+        return None
+
+    @staticmethod
+    def _release(item):
+        legacy_name, references = item
+        for _ in range(references):
+            if delete_from_minio(settings.minio_bucket_name, legacy_name) != MinIOStatusCodes.SUCCESS:
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move legacy photo objects to storage keys.")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the photos that would be moved.")
+    parser.add_argument("--workers", type=int, default=32, help="Parallel object copies.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Photos per batch.")
+    args = parser.parse_args()
+
+    stats = StorageKeyMigration(args.workers, args.batch_size, args.dry_run).run()
+    mode = "dry run" if args.dry_run else "migration"
+    logger.info(f"Storage key {mode} finished: {stats}")
+
+if __name__ == "__main__":
+    main()
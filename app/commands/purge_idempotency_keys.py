@@ -0,0 +1,23 @@
+"""
+Delete expired idempotency keys and their stored responses.
+
+Usage: python -m app.commands.purge_idempotency_keys
+"""
+import logging
+
+from sqlmodel import Session
+
+from app.core.database import engine
+from app.models import group, photo, user  # noqa: F401  (resolve the users foreign key of IdempotencyKey)
+from app.crud.idempotency import purge_expired_idempotency_keys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    with Session(engine) as db:
+        removed = purge_expired_idempotency_keys(db)
+    logger.info(f"Removed {removed} expired idempotency keys.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Rebuild the denormalized photo, storage and membership counters on groups and users.
+
+Usage: python -m app.commands.reconcile_counters
+"""
+import logging
+
+from sqlmodel import Session
+
+from app.core.database import engine
+from app.crud.usage import reconcile_counters
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    with Session(engine) as db:
+        reconcile_counters(db)
+    logger.info("Usage counters reconciled.")
+
+if __name__ == "__main__":
+    main()
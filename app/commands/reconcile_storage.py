@@ -0,0 +1,220 @@
+"""
+Reconcile photo rows in Postgres with objects in the MinIO bucket.
+
+Both sides are streamed in byte-wise key order (S3 listings are UTF-8 binary
+ordered, the SQL side sorts with COLLATE "C") and merge-joined, so memory use
+stays constant no matter how many objects the bucket holds. It reports:
+
+- orphan objects: objects in the bucket that no photo row references
+- dangling rows: photo rows whose object is missing from the bucket
+- ref-count mismatches: objects whose x-amz-meta-ref-count differs from
+  the number of rows sharing them
+
+Without --fix this is a dry run that only reports. With --fix, orphans are
+removed with batched DeleteObjects requests, dangling rows are deleted in
+batches, ref counts are rewritten, and the usage counters are rebuilt.
+
+Legacy rows without a storage_key are matched through the object name in
+their file_path URL, whatever host the URL names. If any such file_path cannot
+be parsed, its object would look like an orphan, so --fix then reports
+orphans but does not remove them.
+
+Objects and rows younger than --grace-minutes are skipped, so uploads and
+deletes that are in flight are not mistaken for drift.
+
+With --group, only that group's groups/<id>/ prefix is listed and compared
+against its rows with a storage_key. Photos still stored under the legacy
+flat names are only covered by a full run.
+
+Usage: python -m app.commands.reconcile_storage [--fix] [--group ID] [--batch-size N] [--grace-minutes N]
+"""
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.crud.usage import reconcile_counters
+from app.services.minio_client import (
+    minio_client, remove_objects_batch, set_object_ref_count
+)
+from app.core.storage import group_storage_prefix, object_url_pattern
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sentinel sorting after every real key, used when one side is exhausted
+_END = None
+
+# Stream (object_name, [(photo_id, settled), ...]) from Postgres, grouped by object in byte order
+def stream_db_objects(connection, grace_minutes: int, batch_size: int, group_id: int = None):
+    if group_id is None:
+        # Photos from before storage_key only have the URL, the object name follows /<bucket>/
+        where = "storage_key IS NOT NULL OR substring(file_path from :url_pattern) IS NOT NULL"
+    else:
+        # Served by ix_photos_group_id; every storage_key of the group is under its prefix
+        where = "group_id = :group_id AND storage_key IS NOT NULL"
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+        text(f"""
+            SELECT COALESCE(storage_key, substring(file_path from :url_pattern)) COLLATE "C" AS object_name,
+                   id,
+                   (upload_time IS NULL OR upload_time < now() - make_interval(mins => :grace)) AS settled
+            FROM photos
+            WHERE {where}
+            ORDER BY object_name
+        """),
+        {"url_pattern": object_url_pattern(settings.minio_bucket_name), "group_id": group_id, "grace": grace_minutes},
+    )
+    for object_name, rows in groupby(result, key=lambda row: row.object_name):
+        yield object_name, [(row.id, row.settled) for row in rows]
+
+# Ids of legacy rows whose object name cannot be recovered from their file_path
+def find_unparseable_rows(connection):
+    return connection.execute(
+        text("""
+            SELECT id FROM photos
+            WHERE storage_key IS NULL AND (file_path IS NULL OR substring(file_path from :url_pattern) IS NULL)
+            ORDER BY id
+        """),
+        {"url_pattern": object_url_pattern(settings.minio_bucket_name)},
+    ).scalars().all()
+
+# Stream objects from the bucket in byte order (user metadata carries the ref count)
+def stream_bucket_objects(key_prefix: str = None):
+    for obj in minio_client.list_objects(
+        settings.minio_bucket_name, prefix=key_prefix, recursive=True, include_user_meta=True
+    ):
+        yield obj.object_name, obj
+
+def _ref_count(obj):
+    for key, value in (obj.metadata or {}).items():
+        if key.lower() == "x-amz-meta-ref-count":
+            return int(value)
+    return None
+
+# Merge-join the two sorted streams into (object_name, rows or None, object or None)
+def merge_join(db_stream, bucket_stream):
+    db_item = next(db_stream, _END)
+    bucket_item = next(bucket_stream, _END)
+    while db_item is not _END or bucket_item is not _END:
+        if bucket_item is _END or (db_item is not _END and db_item[0] < bucket_item[0]):
+            yield db_item[0], db_item[1], None
+            db_item = next(db_stream, _END)
+        elif db_item is _END or bucket_item[0] < db_item[0]:
+            yield bucket_item[0], None, bucket_item[1]
+            bucket_item = next(bucket_stream, _END)
+        else:
+            yield db_item[0], db_item[1], bucket_item[1]
+            db_item = next(db_stream, _END)
+            bucket_item = next(bucket_stream, _END)
+
+
+class Reconciler:
+    def __init__(self, fix: bool, batch_size: int, grace_minutes: int, group_id: int = None):
+        self.fix = fix
+        self.group_id = group_id
+        self.key_prefix = group_storage_prefix(group_id) if group_id is not None else None
+        self.batch_size = batch_size
+        self.grace_minutes = grace_minutes
+        self.cutoff = datetime.now(timezone.utc) - timedelta(minutes=grace_minutes)
+        self.stats = {
+            "matched": 0, "orphan_objects": 0, "dangling_rows": 0, "ref_count_mismatches": 0, "skipped_recent": 0,
+            "unparseable_rows": 0,
+        }
+        self.remove_orphans = fix
+        self._orphans = []
+        self._dangling = []
+
+    def run(self):
+        with engine.connect() as stream_connection, Session(engine) as db:
+            self.db = db
+            if self.key_prefix is None:
+                self._check_unparseable(stream_connection)
+            db_stream = stream_db_objects(stream_connection, self.grace_minutes, self.batch_size, self.group_id)
+            for object_name, rows, obj in merge_join(db_stream, stream_bucket_objects(self.key_prefix)):
+                if rows is None:
+                    self._handle_orphan(object_name, obj)
+                elif obj is None:
+                    self._handle_dangling(object_name, rows)
+                else:
+                    self._handle_matched(object_name, rows, obj)
+            self._flush_orphans()
+            self._flush_dangling()
+            if self.fix and self.stats["dangling_rows"]:
+                reconcile_counters(db)
+        return self.stats
+
+    # Legacy objects are never under groups/, so only a full run can mistake one for an orphan
+    def _check_unparseable(self, connection):
+        unparseable = find_unparseable_rows(connection)
+        self.stats["unparseable_rows"] = len(unparseable)
+        if not unparseable:
+            return
+        logger.warning(f"{len(unparseable)} photo rows have no storage_key and an unrecognized file_path, e.g. ids {unparseable[:20]}")
+        if self.fix:
+            logger.warning("Orphan objects will be reported but not removed until those rows are fixed.")
+            self.remove_orphans = False
+
+    def _handle_orphan(self, object_name, obj):
+        if obj.last_modified is not None and obj.last_modified > self.cutoff:
+            self.stats["skipped_recent"] += 1
+            return
+        self.stats["orphan_objects"] += 1
+        logger.info(f"Orphan object: {object_name}")
+        if self.remove_orphans:
+            self._orphans.append(object_name)
+            if len(self._orphans) >= self.batch_size:
+                self._flush_orphans()
+
+    def _handle_dangling(self, object_name, rows):
+        for photo_id, settled in rows:
+            if not settled:
+                self.stats["skipped_recent"] += 1
+                continue
+            self.stats["dangling_rows"] += 1
+            logger.info(f"Dangling photo row {photo_id}: object {object_name} is missing")
+            if self.fix:
+                self._dangling.append(photo_id)
+                if len(self._dangling) >= self.batch_size:
+                    self._flush_dangling()
+
+    def _handle_matched(self, object_name, rows, obj):
+        self.stats["matched"] += 1
+        ref_count = _ref_count(obj)
+        if ref_count is None or ref_count == len(rows):
+            return
+        self.stats["ref_count_mismatches"] += 1
+        logger.info(f"Ref count mismatch on {object_name}: metadata says {ref_count}, {len(rows)} rows")
+        if self.fix:
+            set_object_ref_count(settings.minio_bucket_name, object_name, len(rows))
+
+    def _flush_orphans(self):
+        if self._orphans:
+            remove_objects_batch(settings.minio_bucket_name, self._orphans)
+            self._orphans = []
+
+    def _flush_dangling(self):
+        if self._dangling:
+            self.db.execute(text("DELETE FROM photos WHERE id = ANY(:ids)"), {"ids": self._dangling})
+            self.db.commit()
+            self._dangling = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile photo rows with bucket objects.")
+    parser.add_argument("--fix", action="store_true", help="Apply fixes instead of only reporting (dry run).")
+    parser.add_argument("--group", type=int, help="Only reconcile this group's storage prefix.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched and objects removed per batch.")
+    parser.add_argument("--grace-minutes", type=int, default=60, help="Ignore objects and rows newer than this.")
+    args = parser.parse_args()
+
+    stats = Reconciler(args.fix, args.batch_size, args.grace_minutes, args.group).run()
+    mode = "fix" if args.fix else "dry run"
+    logger.info(f"Storage reconciliation ({mode}) finished: {stats}")
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,178 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base  # Import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel, Session
 from app.core.config import settings
+from app.services.auth import get_user_id_from_authorization, create_recent_write_token, get_recent_write_user_id
+
+logger = logging.getLogger(__name__)
 
 # Create the Base class using declarative_base
 Base = declarative_base()  # This is the Base class that models should inherit from
 
-# Create the database engine using SQLModel's engine
-engine = create_engine(str(settings.database_url), echo=True)
+# Create a pooled engine with the pool settings shared by the primary and the replicas
+def _create_pooled_engine(url: str, **kwargs) -> Engine:
+    return create_engine(
+        url,
+        echo=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        **kwargs,
+    )
+
+# Create the database engine using SQLModel's engine (all writes go here)
+engine = _create_pooled_engine(str(settings.database_url))
+
+
+class ReplicaPool:
+    """
+    Round-robin selection over read replica engines.
+
+    A background thread, started on first use, probes every replica each
+    health check interval; a replica that fails its probe is skipped until a
+    later probe succeeds. Requests never wait on a probe.
+    """
+
+    def __init__(self, urls: List[str], health_check_interval: int):
+        # A bounded connect keeps a replica that drops packets from stalling reads until the TCP timeout
+        self.engines = [
+            _create_pooled_engine(url, connect_args={"connect_timeout": settings.replica_connect_timeout})
+            for url in urls
+        ]
+        self.health_check_interval = health_check_interval
+        self._healthy = [True] * len(self.engines)
+        self._cycle = itertools.cycle(range(len(self.engines)))
+        self._lock = threading.Lock()
+        self._prober = None
+
+    def _check(self, index: int) -> bool:
+        try:
+            with self.engines[index].connect() as connection:
+                connection.execute(text("SELECT 1"))
+            healthy = True
+        except SQLAlchemyError as e:
+            logger.warning(f"Read replica {index} failed its health check: {str(e)}")
+            healthy = False
+        self._healthy[index] = healthy
+        return healthy
+
+    def _probe_forever(self):
+        while True:
+            for index in range(len(self.engines)):
+                self._check(index)
+            time.sleep(self.health_check_interval)
+
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is None:
+                self._prober = threading.Thread(target=self._probe_forever, name="replica-health-check", daemon=True)
+                self._prober.start()
+
+    def next_engine(self) -> Optional[Engine]:
+        """Return the next healthy replica engine, or None if none is available."""
+        if not self.engines:
+            return None
+        if self._prober is None:
+            self._start_prober()
+        for _ in range(len(self.engines)):
+            with self._lock:
+                index = next(self._cycle)
+            if self._healthy[index]:
+                return self.engines[index]
+        return None
+
+    def status(self) -> List[Dict]:
+        return [
+            {"replica": index, "healthy": self._healthy[index], **pool_status(replica)}
+            for index, replica in enumerate(self.engines)
+        ]
+
+
+replica_pool = ReplicaPool([str(url) for url in settings.read_replica_urls], settings.replica_health_check_interval)
+
+# Cookie carrying the signed time window during which the user's reads stay on the primary
+RECENT_WRITE_COOKIE = "recent_write"
+
+# Flag the request once a session that flushed changes for its user commits
+@event.listens_for(Session, "after_commit")
+def _record_write(session):
+    flushed = session.info.pop("flushed", False)
+    user_id = session.info.get("user_id")
+    request_state = session.info.get("request_state")
+    if user_id is not None and flushed and request_state is not None:
+        request_state.recent_write_user_id = user_id
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session, flush_context):
+    session.info["flushed"] = True
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sets the recent-write cookie on responses to requests that committed a write.
+
+    The cookie is signed and expires after read_your_writes_window, so whichever
+    worker serves the user's next read can tell that it must use the primary.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            user_id = scope.get("state", {}).get("recent_write_user_id")
+            if message["type"] == "http.response.start" and user_id is not None:
+                cookie = (
+                    f"{RECENT_WRITE_COOKIE}={create_recent_write_token(user_id)}; "
+                    f"Max-Age={settings.read_your_writes_window}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
 
 # Dependency to get a new database session for each request
-def get_session():
+def get_session(request: Request):
     with Session(engine) as session:  # Using SQLModel's Session here
+        session.info["user_id"] = get_user_id_from_authorization(request.headers.get("Authorization"))
+        session.info["request_state"] = request.state
         yield session
 
-print(Base.metadata)
\ No newline at end of file
+# Dependency for read-only endpoints: uses a replica unless the user wrote recently
+def get_read_session(request: Request):
+    user_id = get_user_id_from_authorization(request.headers.get("Authorization"))
+    read_engine = None
+    if user_id is None or get_recent_write_user_id(request.cookies.get(RECENT_WRITE_COOKIE)) != user_id:
+        read_engine = replica_pool.next_engine()
+    with Session(read_engine or engine) as session:
+        session.info["user_id"] = user_id
+        yield session
+
+# Connection pool usage for one engine
+def pool_status(target: Engine) -> Dict:
+    pool = target.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+print(Base.metadata)
@@ -0,0 +1,21 @@
+from typing import Any, Iterable, Optional, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, which handles datetimes natively."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+# Serialize SQLAlchemy Row tuples directly. The selected columns already match the
+# response schema, so the per-row Pydantic validation of response_model is skipped.
+def rows_response(rows: Iterable) -> ORJSONResponse:
+    return ORJSONResponse([row._asdict() for row in rows])
+
+# Same as rows_response, wrapped in a keyset page. Columns used only for paging (such as rank) are dropped.
+def page_response(rows: Iterable, next_cursor: Optional[str], exclude: Tuple[str, ...] = ("rank",)) -> ORJSONResponse:
+    items = [{key: value for key, value in row._asdict().items() if key not in exclude} for row in rows]
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
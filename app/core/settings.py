@@ -1,9 +1,22 @@
-from pydantic_settings import BaseSettings  # Updated import
+from pydantic_settings import BaseSettings, SettingsConfigDict  # Updated import
 from pydantic import PostgresDsn
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # Database Configuration
     database_url: PostgresDsn  # Strict validation for PostgreSQL URLs
+    read_replica_urls: List[PostgresDsn] = []  # JSON list, e.g. '["postgresql://user:pw@replica:5432/db"]'
+
+    # Connection Pool Configuration (applied to the primary and to every replica)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds before a connection is recycled
+
+    # Read Replica Routing
+    replica_health_check_interval: int = 10  # Seconds between health checks of a replica
+    replica_connect_timeout: int = 3  # Seconds before connecting to a replica gives up
+    read_your_writes_window: int = 5  # Seconds a user's reads stay on the primary after a write
 
     # Application Configuration
     app_host: str = "127.0.0.1"
@@ -15,6 +28,25 @@ class Settings(BaseSettings):
     minio_secret_key: str
     minio_bucket_name: str
 
+    # Resumable Uploads
+    upload_session_ttl_minutes: int = 1440  # Idle time before an unfinished upload is garbage-collected
+    upload_min_chunk_bytes: int = 5 * 1024 * 1024  # S3 minimum part size (the final chunk may be smaller)
+    upload_max_chunk_bytes: int = 64 * 1024 * 1024
+
+    # Real-time Events
+    events_queue_size: int = 100  # Events buffered per client before it is told to resync
+    events_keepalive_seconds: int = 15
+
+    # Idempotency Keys
+    idempotency_ttl_hours: int = 24  # How long the response to a key is replayed
+    idempotency_lock_seconds: int = 60  # A request still unfinished after this may be taken over by a retry
+    idempotency_wait_seconds: int = 10  # How long a duplicate waits for the first request in another worker
+    idempotency_cache_size: int = 10000  # Completed responses kept in each worker's memory
+
+    # Storage Quotas (in bytes, unlimited when unset)
+    group_quota_bytes: Optional[int] = None
+    user_quota_bytes: Optional[int] = None
+
     # Security Settings
     secret_key: str
     algorithm: str = "HS256"
@@ -23,6 +55,7 @@ class Settings(BaseSettings):
     # Debug Configuration
     debug: bool = False
 
-    class Config:
-        env_file = ".env"  # Path to your .env file
-        env_file_encoding = "utf-8"
+    model_config = SettingsConfigDict(
+        env_file=".env",  # Path to your .env file
+        env_file_encoding="utf-8",
+    )
@@ -0,0 +1,35 @@
+import os
+import re
+import uuid
+
+from app.core.config import settings
+
+# Object keys and URLs only; kept free of the MinIO client so models and migrations can use them
+
+# Number of hex characters of the photo UUID used as the shard directory
+STORAGE_KEY_SHARD_LENGTH = 2
+
+# Prefix holding every object of a group
+def group_storage_prefix(group_id: int) -> str:
+    return f"groups/{group_id}/"
+
+# Unique object key for a new photo: groups/{group_id}/{shard}/{photo_uuid}{ext}
+# The shard spreads a group's objects over 256 sub-prefixes; the extension keeps content types guessable.
+def build_storage_key(group_id: int, image_name: str) -> str:
+    photo_uuid = uuid.uuid4().hex
+    extension = os.path.splitext(image_name or "")[1].lower()
+    return f"{group_storage_prefix(group_id)}{photo_uuid[:STORAGE_KEY_SHARD_LENGTH]}/{photo_uuid}{extension}"
+
+# Generate MinIO object URL
+def get_minio_object_url(bucket_name: str, object_name: str) -> str:
+    return f"{settings.minio_endpoint}/{bucket_name}/{object_name}"
+
+# Regex capturing the object name of a URL built by get_minio_object_url, whatever endpoint built it
+# (the app container and an operator shell usually reach MinIO under different hosts). Valid in Python and Postgres.
+def object_url_pattern(bucket_name: str) -> str:
+    return "^[A-Za-z][A-Za-z0-9+.-]*://[^/]*/" + re.escape(bucket_name) + "/(.+)$"
+
+# Recover the object name from a URL built by get_minio_object_url (None if it is not a URL into the bucket)
+def get_object_name_from_url(bucket_name: str, url: str):
+    match = re.match(object_url_pattern(bucket_name), url or "")
+    return match.group(1) if match else None
\ No newline at end of file
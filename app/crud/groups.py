@@ -1,10 +1,15 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
 from app.models.group import Group
-from app.models.user import User
+from app.models.user import User, user_groups
 from app.schemas.group import GroupCreate
-from app.crud.users import get_user_by_email
+from app.crud.users import get_user_by_email, get_user_in_group
+from app.crud.usage import adjust_membership_usage
+from app.crud.uploads import abort_group_upload_sessions
+from app.services.notifications import publish_event, MEMBER_ADDED, MEMBER_REMOVED, GROUP_DELETED
 
 # Check if a group with the same name already exists
 def get_group_by_name(db: Session, name: str):
@@ -35,12 +40,22 @@ def create_group(db: Session, group: GroupCreate, admin_id: int):
         admin_id=admin_id
     )
     db.add(new_group)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request created the same name between the check and the insert
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Group with this name already exists."
+        )
     db.refresh(new_group)
     
     # Add admin as the first member
     new_group.members.append(db.query(User).get(admin_id))
+    adjust_membership_usage(db, admin_id, new_group.id, 1)
     db.commit()
+    db.refresh(new_group)
 
     return new_group
 
@@ -67,15 +82,20 @@ def invite_user_to_group(db: Session, current_user_id: int, group_id: int, email
             detail="Only the admin can send invites",
         )
     
-    # Check if the user is already a member
-    if invited_user in group.members:
+    # Add user to group; the insert doubles as the membership check, so concurrent invites can't both succeed
+    added = db.execute(
+        insert(user_groups)
+        .values(user_id=invited_user.id, group_id=group_id)
+        .on_conflict_do_nothing()
+        .returning(user_groups.c.user_id)
+    ).first()
+    if not added:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User is already a member of this group."
         )
-    
-    # Add user to group
-    group.members.append(invited_user)
+    adjust_membership_usage(db, invited_user.id, group_id, 1)
+    publish_event(db, MEMBER_ADDED, group_id, u=invited_user.id)
     db.commit()
     return {"detail": "User invited successfully."}
 
@@ -84,15 +104,14 @@ def remove_user_from_group(db: Session, group_id: int, user_id: int, current_use
     group = get_group_by_id(db, group_id)
 
     # Ensure user is a member
-    user_to_remove = db.query(User).get(user_id)
-    if user_to_remove not in group.members:
+    if not get_user_in_group(db, user_id, group_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User is not a member of this group."
         )
 
     # Admin can't remove themselves if other members are present
-    if group.admin_id == user_id and len(group.members) > 1:
+    if group.admin_id == user_id and group.member_count > 1:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin cannot remove themselves if other users are present."
@@ -106,10 +125,19 @@ def remove_user_from_group(db: Session, group_id: int, user_id: int, current_use
         )
 
     # If admin is last member, delete the group
-    if group.admin_id == user_id and len(group.members) == 1:
+    delete_group = group.admin_id == user_id and group.member_count <= 1
+    if delete_group:
+        # Lock the upload sessions before the counter rows, in the same order as finalize_upload_session
+        abort_group_upload_sessions(db, group_id)
+    adjust_membership_usage(db, user_id, group_id, -1)
+    if delete_group:
+        publish_event(db, GROUP_DELETED, group_id)
         db.delete(group)
     else:
-        group.members.remove(user_to_remove)
+        publish_event(db, MEMBER_REMOVED, group_id, u=user_id)
+        db.execute(
+            user_groups.delete().where(user_groups.c.user_id == user_id, user_groups.c.group_id == group_id)
+        )
     
     db.commit()
     return {"detail": "User removed successfully."}
\ No newline at end of file
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+from app.core.config import settings
+
+# Look up a key with a single primary key read
+def get_idempotency_key(db: Session, user_id: int, key: str) -> Optional[IdempotencyKey]:
+    return db.get(IdempotencyKey, (user_id, key))
+
+# Claim a key for a new request, taking over a claim or response that has expired; returns whether it was claimed
+def claim_idempotency_key(db: Session, user_id: int, key: str, fingerprint: str) -> bool:
+    now = datetime.utcnow()
+    statement = insert(IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.idempotency_lock_seconds)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+        set_={
+            "fingerprint": statement.excluded.fingerprint,
+            "response_status": None,
+            "response_headers": None,
+            "response_body": None,
+            "created_at": statement.excluded.created_at,
+            "expires_at": statement.excluded.expires_at,
+        },
+        where=IdempotencyKey.expires_at <= now
+    ).returning(IdempotencyKey.user_id)
+    claimed = db.execute(statement).first() is not None
+    db.commit()
+    return claimed
+
+# Claim still held by this request: a request that outlives idempotency_lock_seconds can have its key taken over
+def _own_claim(db: Session, user_id: int, key: str, fingerprint: str):
+    return db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.fingerprint == fingerprint,
+        IdempotencyKey.response_status.is_(None)
+    )
+
+# Store the response of a claimed key, returning when it expires (None if the claim was taken over meanwhile)
+def complete_idempotency_key(
+    db: Session, user_id: int, key: str, fingerprint: str, response_status: int, response_headers: list, response_body: bytes
+) -> Optional[datetime]:
+    expires_at = datetime.utcnow() + timedelta(hours=settings.idempotency_ttl_hours)
+    updated = _own_claim(db, user_id, key, fingerprint).update(
+        {
+            IdempotencyKey.response_status: response_status,
+            IdempotencyKey.response_headers: response_headers,
+            IdempotencyKey.response_body: response_body,
+            IdempotencyKey.expires_at: expires_at,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return expires_at if updated else None
+
+# Drop an unfinished claim so the request can be retried
+def release_idempotency_key(db: Session, user_id: int, key: str, fingerprint: str):
+    _own_claim(db, user_id, key, fingerprint).delete(synchronize_session=False)
+    db.commit()
+
+# Delete expired keys in batches, returning how many were removed
+def purge_expired_idempotency_keys(db: Session, batch_size: int = 1000) -> int:
+    removed = 0
+    while True:
+        expired = (
+            db.query(IdempotencyKey.user_id, IdempotencyKey.key)
+            .filter(IdempotencyKey.expires_at <= datetime.utcnow())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not expired:
+            return removed
+        db.query(IdempotencyKey).filter(
+            tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_([tuple(row) for row in expired])
+        ).delete(synchronize_session=False)
+        db.commit()
+        removed += len(expired)
\ No newline at end of file
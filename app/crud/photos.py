@@ -7,32 +7,36 @@ from app.models.user import User
 from app.models.photo import Photo
 from app.schemas.photo import PhotoUpload, PhotoResponse
 from app.crud.users import get_current_user
-from app.services.minio_client import upload_to_minio, get_minio_object_url, delete_from_minio
+from app.crud.usage import adjust_photo_usage, check_upload_quota
+from app.services.minio_client import upload_to_minio, delete_from_minio
 from app.services.minio_status_codes import MinIOStatusCodes
+from app.services.notifications import publish_event, PHOTO_ADDED, PHOTO_DELETED
 from app.core.config import settings
+from app.core.storage import build_storage_key, get_object_name_from_url
 from app.core.security import oauth2_scheme
 
-async def handle_image_upload(image_data: bytes, image_name: str, user_id: int, group_id: int) -> str:
+# Object name images were stored under before storage keys (still used by photos without a storage_key)
+def photo_object_name(group_id: int, user_id: int, image_name: str) -> str:
+    return f"{group_id}_{user_id}_{image_name}"
+
+async def handle_image_upload(image_data: bytes, storage_key: str) -> str:
     """
     Handles uploading an image to MinIO.
 
     :param image_data: The image file data in bytes.
-    :param image_name: Name of the image.
-    :param user_id: The ID of the user uploading the image.
-    :param group_id: ID of the group image is getting uploaded.
-    :return: The URL of the uploaded image.
+    :param storage_key: The object key of the image, see build_storage_key.
+    :return: The storage key of the uploaded image.
     :raises Exception: If the upload fails.
     """
     bucket_name = settings.minio_bucket_name
-    object_name = f"{group_id}_{user_id}_{image_name}"
 
     try:
         # Attempt to upload the image
-        result = upload_to_minio(image_data, bucket_name, object_name)
+        result = upload_to_minio(image_data, bucket_name, storage_key)
 
         # Handle successful or already existing objects
         if result in [MinIOStatusCodes.SUCCESS, MinIOStatusCodes.OBJECT_ALREADY_EXIST]:
-            return get_minio_object_url(bucket_name, object_name)
+            return storage_key
 
         # If upload fails, raise an exception with a descriptive message
         raise Exception(f"Failed to upload image. Status code: {result}")
@@ -41,8 +45,8 @@ async def handle_image_upload(image_data: bytes, image_name: str, user_id: int,
         raise Exception(f"Error during image upload: {str(e)}") from e
     
 
-async def upload_photo(db: Session, user_id: int, group_id: int, image: UploadFile) -> PhotoResponse:
-
+# Check that a user may upload size_bytes into a group, returning the user and the group
+def check_upload_allowed(db: Session, user_id: int, group_id: int, size_bytes: int):
     # Check if the group exists
     group = db.query(Group).filter(Group.id == group_id).first()
     if not group:
@@ -64,12 +68,34 @@ async def upload_photo(db: Session, user_id: int, group_id: int, image: UploadFi
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User is not a member of this group"
         )
-    
+
+    check_upload_quota(user, group, size_bytes)
+    return user, group
+
+# Create the photo row for an uploaded object and update the usage counters
+def create_photo_record(db: Session, user_id: int, group_id: int, name: str, storage_key: str, size_bytes: int) -> Photo:
+    new_photo = Photo(
+        name=name,
+        storage_key=storage_key,
+        user_id=user_id,
+        group_id=group_id,
+        size_bytes=size_bytes
+    )
+    db.add(new_photo)
+    adjust_photo_usage(db, user_id, group_id, 1, size_bytes)
+    db.flush()
+    publish_event(db, PHOTO_ADDED, group_id, p=new_photo.id, u=user_id)
+    db.commit()
+    db.refresh(new_photo)
+    return new_photo
+
+async def upload_photo(db: Session, user_id: int, group_id: int, image: UploadFile) -> PhotoResponse:
     # Upload the photo to MinIO
     image_data = await image.read()
     image_name = image.name
+    check_upload_allowed(db, user_id, group_id, len(image_data))
     try:
-        image_url = await handle_image_upload(image_data, image_name, user_id, group_id)
+        storage_key = await handle_image_upload(image_data, build_storage_key(group_id, image_name))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -77,24 +103,18 @@ async def upload_photo(db: Session, user_id: int, group_id: int, image: UploadFi
         )
     
     # If the upload is successful, create a new photo record
-    new_photo = Photo(
-        name=image.name,
-        file_path=image_url,
-        user_id=user_id,
-        group_id=group_id
-    )
-    db.add(new_photo)
-    db.commit()
-    db.refresh(new_photo)
-    return new_photo
+    return create_photo_record(db, user_id, group_id, image.name, storage_key, len(image_data))
+
+# Columns of PhotoResponse, selected directly so listings return Row tuples instead of hydrated Photo objects
+PHOTO_RESPONSE_COLUMNS = (Photo.id, Photo.name, Photo.file_path.label("file_path"), Photo.upload_time, Photo.user_id)
 
 # Get all photos for a user
 def get_user_photos(db: Session, user_id: int):
-    return db.query(Photo).filter(Photo.user_id == user_id).all()
+    return db.query(*PHOTO_RESPONSE_COLUMNS).filter(Photo.user_id == user_id).all()
 
 # Get all photos for a group
 def get_group_photos(db: Session, group_id: int):
-    return db.query(Photo).filter(Photo.group_id == group_id).all()
+    return db.query(*PHOTO_RESPONSE_COLUMNS).filter(Photo.group_id == group_id).all()
 
 # Get photo by ID
 def get_photo_by_id(db: Session, photo_id: int) -> Photo:
@@ -117,15 +137,20 @@ def delete_photo(db: Session, group_id: int, user_id: int, photo_id: int):
     if photo.user_id != user_id and not db.query(Group).filter(Group.id == photo.group_id, Group.admin_id == user_id).first():
         raise PermissionError("You do not have permission to delete this photo.")
 
-    # Delete from MinIO
+    # Delete from MinIO (legacy objects were stored under the uploader's key, not the caller's)
     bucket_name = settings.minio_bucket_name
-    object_name = f"{group_id}_{user_id}_{photo.name}"
-    delete_status = delete_from_minio(settings.minio_bucket_name, object_name)
+    object_name = photo.storage_key or get_object_name_from_url(bucket_name, photo.legacy_file_path)
+    if object_name is None:
+        object_name = photo_object_name(photo.group_id, photo.user_id, photo.name)
+    delete_status = delete_from_minio(bucket_name, object_name)
     
-    if delete_status != MinIOStatusCodes.SUCCESS:
+    # An object that is already gone must not block removing its row
+    if delete_status not in [MinIOStatusCodes.SUCCESS, MinIOStatusCodes.OBJECT_NOT_FOUND]:
         raise Exception(f"Failed to delete photo from MinIO: {MinIOStatusCodes.get_status_description(delete_status)}")
 
     # Delete from database
+    adjust_photo_usage(db, photo.user_id, photo.group_id, -1, -photo.size_bytes)
+    publish_event(db, PHOTO_DELETED, photo.group_id, p=photo.id)
     db.delete(photo)
     db.commit()
 
@@ -0,0 +1,94 @@
+import base64
+import json
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Numeric, cast, func, or_, tuple_
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.models.group import Group
+from app.models.photo import Photo
+from app.models.user import user_groups
+from app.crud.photos import PHOTO_RESPONSE_COLUMNS
+
+# Ranks are rounded to a fixed-precision numeric so a cursor compares exactly against recomputed ranks
+RANK_DIGITS = 6
+
+# Best similarity of the query to any of the columns
+def _rank(query: str, *columns):
+    similarity = func.greatest(*(func.similarity(func.coalesce(column, ""), query) for column in columns))
+    return func.round(cast(similarity, Numeric), RANK_DIGITS).label("rank")
+
+# Case-insensitive substring match; backed by the pg_trgm GIN indexes like the % similarity operator
+def _matches(column, query: str):
+    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(column.ilike(pattern, escape="\\"), column.op("%")(query))
+
+def encode_cursor(rank: Decimal, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([str(rank), row_id]).encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(payload, list) or len(payload) != 2:
+            raise ValueError("cursor must be a [rank, id] pair")
+        rank, row_id = Decimal(payload[0]), int(payload[1])
+        if not rank.is_finite():
+            raise ValueError("rank must be finite")
+        return rank, row_id
+    except (ValueError, TypeError, ArithmeticError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+# Order by rank then id (both descending) and continue after the cursor, returning (rows, next_cursor)
+def _keyset_page(db: Session, subquery, limit: int, cursor: Optional[str]):
+    query = db.query(subquery).order_by(subquery.c.rank.desc(), subquery.c.id.desc())
+    if cursor:
+        rank, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(subquery.c.rank, subquery.c.id) < tuple_(rank, row_id))
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].rank, rows[-1].id)
+
+# Search the groups the user belongs to by name and description
+def search_groups(db: Session, user_id: int, query: str, limit: int, cursor: Optional[str] = None):
+    subquery = (
+        db.query(Group.id, Group.name, Group.description, Group.admin_id, _rank(query, Group.name, Group.description))
+        .join(user_groups, user_groups.c.group_id == Group.id)
+        .filter(user_groups.c.user_id == user_id)
+        .filter(or_(_matches(Group.name, query), _matches(Group.description, query)))
+        .subquery()
+    )
+    return _keyset_page(db, subquery, limit, cursor)
+
+# Search photo names within the user's groups (or within one of them)
+def search_photos(db: Session, user_id: int, query: str, limit: int, cursor: Optional[str] = None, group_id: Optional[int] = None):
+    member_groups = db.query(user_groups.c.group_id).filter(user_groups.c.user_id == user_id)
+    if group_id is not None:
+        if not member_groups.filter(user_groups.c.group_id == group_id).first():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not a member of this group."
+            )
+        photos = db.query(*PHOTO_RESPONSE_COLUMNS, Photo.group_id).filter(Photo.group_id == group_id).subquery()
+    else:
+        # Materialized so the planner reads the member groups' photos through ix_photos_group_id and filters them,
+        # instead of probing the trigram index once per group: a % over common trigrams matches most of the table
+        photos = (
+            db.query(*PHOTO_RESPONSE_COLUMNS, Photo.group_id)
+            .filter(Photo.group_id.in_(member_groups.scalar_subquery()))
+            .cte("member_photos")
+            .prefix_with("MATERIALIZED")
+        )
+
+    subquery = (
+        db.query(photos, _rank(query, photos.c.name))
+        .filter(_matches(photos.c.name, query))
+        .subquery()
+    )
+    return _keyset_page(db, subquery, limit, cursor)
@@ -0,0 +1,195 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.models.group import Group
+from app.models.photo import Photo
+from app.models.user import User
+from app.models.upload_session import UploadSession
+from app.crud.photos import check_upload_allowed, create_photo_record
+from app.services.minio_client import (
+    create_multipart_upload, upload_part, complete_multipart_upload, abort_multipart_upload
+)
+from app.core.storage import build_storage_key
+from app.services.minio_status_codes import MinIOStatusCodes
+from app.core.config import settings
+
+# Abort results after which no parts are left behind; on anything else the session is kept for a retry,
+# since parts of a multipart upload never show up in object listings
+ABORTED = [MinIOStatusCodes.SUCCESS, MinIOStatusCodes.OBJECT_NOT_FOUND]
+
+def _expiry() -> datetime:
+    return datetime.utcnow() + timedelta(minutes=settings.upload_session_ttl_minutes)
+
+# Start a resumable upload: validate the target group and quota, then open a MinIO multipart upload
+def create_upload_session(db: Session, user_id: int, group_id: int, name: str, upload_length: int) -> UploadSession:
+    if upload_length <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload length must be positive."
+        )
+    check_upload_allowed(db, user_id, group_id, upload_length)
+
+    bucket_name = settings.minio_bucket_name
+    object_name = build_storage_key(group_id, name)
+    try:
+        multipart_upload_id = create_multipart_upload(bucket_name, object_name)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start the upload"
+        )
+
+    upload = UploadSession(
+        id=uuid.uuid4().hex,
+        name=name,
+        object_name=object_name,
+        multipart_upload_id=multipart_upload_id,
+        upload_length=upload_length,
+        upload_offset=0,
+        parts=[],
+        expires_at=_expiry(),
+        user_id=user_id,
+        group_id=group_id
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+# Get an upload session owned by the user (optionally locking it for a chunk write)
+def get_upload_session(db: Session, upload_id: str, user_id: int, for_update: bool = False) -> UploadSession:
+    query = db.query(UploadSession).filter(UploadSession.id == upload_id, UploadSession.user_id == user_id)
+    if for_update:
+        query = query.with_for_update()
+    upload = query.first()
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    if upload.expires_at <= datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Upload session expired"
+        )
+    return upload
+
+# Append a chunk at the given offset; each chunk becomes one multipart part
+def append_upload_chunk(db: Session, upload_id: str, user_id: int, offset: int, data: bytes) -> UploadSession:
+    # The row lock serializes concurrent PATCHes of the same session
+    upload = get_upload_session(db, upload_id, user_id, for_update=True)
+
+    if offset != upload.upload_offset:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload offset mismatch, current offset is {upload.upload_offset}"
+        )
+    end = offset + len(data)
+    if end > upload.upload_length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk extends past the declared upload length."
+        )
+    # S3 parts must be at least the minimum part size, except the last one
+    if end < upload.upload_length and len(data) < settings.upload_min_chunk_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only the final chunk may be smaller than {settings.upload_min_chunk_bytes} bytes."
+        )
+
+    part_number = len(upload.parts) + 1
+    try:
+        etag = upload_part(settings.minio_bucket_name, upload.object_name, upload.multipart_upload_id, part_number, data)
+    except Exception as e:
+        # The offset is unchanged, so the client simply re-sends this chunk
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to store the chunk"
+        )
+
+    upload.parts = upload.parts + [{"part_number": part_number, "etag": etag, "size": len(data)}]
+    upload.upload_offset = end
+    upload.expires_at = _expiry()
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+# Complete the multipart upload and create the photo row
+def finalize_upload_session(db: Session, upload_id: str, user_id: int) -> Photo:
+    upload = get_upload_session(db, upload_id, user_id, for_update=True)
+    if upload.upload_offset != upload.upload_length:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete, {upload.upload_offset} of {upload.upload_length} bytes received"
+        )
+    # Membership and quota may have changed since the session was opened. Locking the counter rows (user first,
+    # like adjust_photo_usage) keeps concurrent finalizations from all passing against the same bytes_used.
+    db.query(User).filter(User.id == user_id).with_for_update().populate_existing().first()
+    db.query(Group).filter(Group.id == upload.group_id).with_for_update().populate_existing().first()
+    check_upload_allowed(db, user_id, upload.group_id, upload.upload_length)
+
+    bucket_name = settings.minio_bucket_name
+    result = complete_multipart_upload(bucket_name, upload.object_name, upload.multipart_upload_id, upload.parts)
+    if result not in [MinIOStatusCodes.SUCCESS, MinIOStatusCodes.OBJECT_ALREADY_EXIST]:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upload the photo"
+        )
+
+    name, group_id, storage_key, size_bytes = upload.name, upload.group_id, upload.object_name, upload.upload_length
+    db.delete(upload)
+    return create_photo_record(db, user_id, group_id, name, storage_key, size_bytes)
+
+# Abort an upload session and discard its stored parts
+def abort_upload_session(db: Session, upload: UploadSession):
+    result = abort_multipart_upload(settings.minio_bucket_name, upload.object_name, upload.multipart_upload_id)
+    if result not in ABORTED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to abort the upload"
+        )
+    db.delete(upload)
+    db.commit()
+
+# Abort expired upload sessions in batches, returning how many were removed and how many failed to abort
+def expire_upload_sessions(db: Session, batch_size: int = 100):
+    removed = failed = 0
+    after = None  # Keyset position, so sessions that failed to abort are left for the next run
+    while True:
+        query = db.query(UploadSession).filter(UploadSession.expires_at <= datetime.utcnow())
+        if after is not None:
+            query = query.filter(tuple_(UploadSession.expires_at, UploadSession.id) > after)
+        expired = (
+            query.order_by(UploadSession.expires_at, UploadSession.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not expired:
+            return removed, failed
+        for upload in expired:
+            result = abort_multipart_upload(settings.minio_bucket_name, upload.object_name, upload.multipart_upload_id)
+            if result in ABORTED:
+                db.delete(upload)
+                removed += 1
+            else:
+                failed += 1
+        after = (expired[-1].expires_at, expired[-1].id)
+        db.commit()
+
+# Abort the upload sessions of a group that is about to be deleted (the caller commits)
+def abort_group_upload_sessions(db: Session, group_id: int):
+    uploads = db.query(UploadSession).filter(UploadSession.group_id == group_id).with_for_update().all()
+    for upload in uploads:
+        result = abort_multipart_upload(settings.minio_bucket_name, upload.object_name, upload.multipart_upload_id)
+        if result in ABORTED:
+            db.delete(upload)
+        else:
+            # Detach it from the group and let gc_upload_sessions retry the abort
+            upload.group_id = None
+            upload.expires_at = datetime.utcnow()
+    db.flush()
\ No newline at end of file
@@ -0,0 +1,77 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.models.group import Group
+from app.models.user import User
+from app.core.config import settings
+
+# Adjust the photo counters of the uploader and the group (call before committing the photo change)
+def adjust_photo_usage(db: Session, user_id: int, group_id: int, photos: int, size_bytes: int):
+    db.query(User).filter(User.id == user_id).update(
+        {User.photo_count: User.photo_count + photos, User.bytes_used: User.bytes_used + size_bytes},
+        synchronize_session=False,
+    )
+    if group_id is not None:
+        db.query(Group).filter(Group.id == group_id).update(
+            {Group.photo_count: Group.photo_count + photos, Group.bytes_used: Group.bytes_used + size_bytes},
+            synchronize_session=False,
+        )
+
+# Adjust the membership counters of a user and a group (call before committing the membership change)
+def adjust_membership_usage(db: Session, user_id: int, group_id: int, members: int):
+    db.query(User).filter(User.id == user_id).update(
+        {User.group_count: User.group_count + members}, synchronize_session=False
+    )
+    db.query(Group).filter(Group.id == group_id).update(
+        {Group.member_count: Group.member_count + members}, synchronize_session=False
+    )
+
+# Reject an upload that would push the user or the group over its quota
+def check_upload_quota(user: User, group: Group, size_bytes: int):
+    if settings.user_quota_bytes is not None and user.bytes_used + size_bytes > settings.user_quota_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Upload exceeds the user's storage quota."
+        )
+    if settings.group_quota_bytes is not None and group.bytes_used + size_bytes > settings.group_quota_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Upload exceeds the group's storage quota."
+        )
+
+# Rebuild every counter from the photos and user_groups tables in bulk
+def reconcile_counters(db: Session):
+    db.execute(text("""
+        UPDATE groups AS g
+        SET photo_count = COALESCE(p.photo_count, 0),
+            bytes_used = COALESCE(p.bytes_used, 0),
+            member_count = COALESCE(m.member_count, 0)
+        FROM groups AS src
+        LEFT JOIN (
+            SELECT group_id, COUNT(*) AS photo_count, SUM(size_bytes) AS bytes_used
+            FROM photos GROUP BY group_id
+        ) AS p ON p.group_id = src.id
+        LEFT JOIN (
+            SELECT group_id, COUNT(*) AS member_count
+            FROM user_groups GROUP BY group_id
+        ) AS m ON m.group_id = src.id
+        WHERE g.id = src.id
+    """))
+    db.execute(text("""
+        UPDATE users AS u
+        SET photo_count = COALESCE(p.photo_count, 0),
+            bytes_used = COALESCE(p.bytes_used, 0),
+            group_count = COALESCE(m.group_count, 0)
+        FROM users AS src
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS photo_count, SUM(size_bytes) AS bytes_used
+            FROM photos GROUP BY user_id
+        ) AS p ON p.user_id = src.id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS group_count
+            FROM user_groups GROUP BY user_id
+        ) AS m ON m.user_id = src.id
+        WHERE u.id = src.id
+    """))
+    db.commit()
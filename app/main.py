@@ -1,6 +1,9 @@
 from fastapi import FastAPI
-from app.api import users, photos, groups
+from app.api import users, photos, groups, uploads, events, metrics
 from app.services.minio_client import setup_minio_bucket
+from app.services.notifications import event_listener
+from app.services.idempotency import IdempotencyMiddleware
+from app.core.database import ReadYourWritesMiddleware
 from app.core.config import settings
 import os
 
@@ -8,16 +11,27 @@ import os
 async def app_lifespan(app: FastAPI):
     # Perform startup tasks
     setup_minio_bucket()  # Ensure the MinIO bucket exists
+    event_listener.start()  # One LISTEN connection per worker feeds the real-time event streams
     yield  # Control flow will pause here during the lifespan of the app
     # Perform shutdown tasks if needed
+    await event_listener.stop()
     print("Shutting down the application.")
 
 # Create the FastAPI app with a lifespan context
 app = FastAPI(title="Photo Album App", debug=settings.debug, lifespan=app_lifespan)
 
+# Keep a user's reads on the primary for a moment after they write, whichever worker serves them
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Retried POST/PUT/PATCH/DELETE requests carrying an Idempotency-Key header get the first response replayed
+app.add_middleware(IdempotencyMiddleware)
+
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(photos.router, prefix="/photos", tags=["Photos"])
 app.include_router(groups.router, prefix="/groups", tags=["Groups"])
+app.include_router(uploads.router, prefix="/uploads", tags=["Uploads"])
+app.include_router(events.router, prefix="/events", tags=["Events"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
 # Get host and port from environment
 HOST = os.getenv("APP_HOST", "127.0.0.1")
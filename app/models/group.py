@@ -1,15 +1,26 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class Group(Base):
     __tablename__ = "groups"
+    __table_args__ = (
+        # Unique names back the create_group check; trigram indexes back the search endpoints
+        Index("ix_groups_name", "name", unique=True),
+        Index("ix_groups_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_groups_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     description = Column(String)
     admin_id = Column(Integer, ForeignKey("users.id"))
 
+    # Usage counters, maintained by the crud layer and rebuilt by app.commands.reconcile_counters
+    photo_count = Column(Integer, nullable=False, default=0, server_default="0")
+    bytes_used = Column(BigInteger, nullable=False, default=0, server_default="0")
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Relationship with Users (many-to-many through user_groups)
     members = relationship("User", secondary="user_groups", back_populates="groups")
 
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, LargeBinary, func
+from app.core.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Keys are chosen by clients, so they are scoped to the user sending them
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of the method, path, query string and body
+    response_status = Column(Integer)  # NULL while the first request is still being processed
+    response_headers = Column(JSON)  # [[name, value], ...]
+    response_body = Column(LargeBinary)
+    created_at = Column(DateTime, default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
\ No newline at end of file
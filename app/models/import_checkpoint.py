@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.core.database import Base
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+
+    source = Column(String, primary_key=True)  # Absolute path of the manifest or directory being imported
+    position = Column(Integer, nullable=False)  # Last manifest position whose photo row is committed
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
\ No newline at end of file
@@ -1,14 +1,27 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index, func, literal
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
+from app.core.config import settings
 from app.core.database import Base
+from app.core.storage import get_minio_object_url
 
 class Photo(Base):
     __tablename__ = "photos"
+    __table_args__ = (
+        # Name search within a group: btree_gin lets group_id share the trigram GIN index
+        Index(
+            "ix_photos_group_id_name_trgm", "group_id", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+        Index("ix_photos_storage_key", "storage_key", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
-    file_path = Column(String)
+    storage_key = Column(String)  # Object key, see build_storage_key
+    legacy_file_path = Column("file_path", String)  # Full URL of objects stored before storage_key existed
+    size_bytes = Column(BigInteger, nullable=False, default=0, server_default="0")
     upload_time = Column(DateTime, default=func.now())
 
     # Foreign keys
@@ -17,4 +30,15 @@ class Photo(Base):
 
     # Relationships
     owner = relationship("User", back_populates="photos")
-    group = relationship("Group", back_populates="photos")
\ No newline at end of file
+    group = relationship("Group", back_populates="photos")
+
+    # URL of the object, generated at read time from storage_key
+    @hybrid_property
+    def file_path(self):
+        if self.storage_key:
+            return get_minio_object_url(settings.minio_bucket_name, self.storage_key)
+        return self.legacy_file_path
+
+    @file_path.expression
+    def file_path(cls):
+        return func.coalesce(literal(get_minio_object_url(settings.minio_bucket_name, "")) + cls.storage_key, cls.legacy_file_path)
\ No newline at end of file
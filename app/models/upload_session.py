@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, JSON, func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True)  # Opaque token handed to the client
+    name = Column(String)
+    object_name = Column(String)
+    multipart_upload_id = Column(String)  # MinIO multipart upload backing this session
+    upload_length = Column(BigInteger, nullable=False)
+    upload_offset = Column(BigInteger, nullable=False, default=0)
+    parts = Column(JSON, nullable=False, default=list)  # [{"part_number", "etag", "size"}, ...]
+    created_at = Column(DateTime, default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    # Foreign keys
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"))
+
+    # Relationships
+    owner = relationship("User")
+    group = relationship("Group")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Table
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -10,6 +10,11 @@ class User(Base):
     name = Column(String)
     hashed_password = Column(String)
 
+    # Usage counters, maintained by the crud layer and rebuilt by app.commands.reconcile_counters
+    photo_count = Column(Integer, nullable=False, default=0, server_default="0")
+    bytes_used = Column(BigInteger, nullable=False, default=0, server_default="0")
+    group_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Relationship with Group (many-to-many through membership)
     groups = relationship("Group", secondary="user_groups", back_populates="members", cascade="all, delete")
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 
 class GroupBase(BaseModel):
@@ -13,5 +13,19 @@ class GroupResponse(GroupBase):
     members: List[str]  # List of member names
     admin_id: int
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class GroupUsage(BaseModel):
+    group_id: int
+    photo_count: int
+    bytes_used: int
+    member_count: int
+    quota_bytes: Optional[int] = None
+
+class GroupSearchResult(GroupBase):
+    id: int
+    admin_id: int
+
+class GroupSearchPage(BaseModel):
+    items: List[GroupSearchResult]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to get the next page
\ No newline at end of file
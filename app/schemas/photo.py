@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
 from datetime import datetime
 
 class PhotoBase(BaseModel):
@@ -9,13 +9,18 @@ class PhotoBase(BaseModel):
 class PhotoUpload(PhotoBase):
     group_id: int  # Photo belongs to this group
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PhotoResponse(PhotoBase):
     id: int
     upload_time: datetime
     user_id: int
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class PhotoSearchResult(PhotoResponse):
+    group_id: int
+
+class PhotoSearchPage(BaseModel):
+    items: List[PhotoSearchResult]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to get the next page
\ No newline at end of file
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+class UploadSessionCreate(BaseModel):
+    name: str
+    upload_length: int  # Total size of the file in bytes
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    name: str
+    group_id: int
+    upload_offset: int
+    upload_length: int
+    expires_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import List, Optional
 from datetime import datetime
 
@@ -17,8 +17,14 @@ class UserResponse(UserBase):
     id: int
     groups: List[str]  # List of group names user is part of
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class UserUsage(BaseModel):
+    user_id: int
+    photo_count: int
+    bytes_used: int
+    group_count: int
+    quota_bytes: Optional[int] = None
 
 # Schema for Token (JWT Response)
 class Token(BaseModel):
@@ -47,4 +47,28 @@ def decode_access_token(token: str):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+# Short-lived signed marker of a user's last write, carried by the client so that every worker sees it
+def create_recent_write_token(user_id: int) -> str:
+    expire = datetime.utcnow() + timedelta(seconds=settings.read_your_writes_window)
+    return jwt.encode({"rw": user_id, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+# User id of a valid, unexpired recent-write token (None otherwise)
+def get_recent_write_user_id(token: Optional[str]) -> Optional[int]:
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("rw")
+
+# Extract the user id from an "Authorization: Bearer <token>" header without failing the request
+def get_user_id_from_authorization(authorization: Optional[str]) -> Optional[int]:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("id")
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.crud.idempotency import (
+    get_idempotency_key, claim_idempotency_key, complete_idempotency_key, release_idempotency_key
+)
+from app.services.auth import get_user_id_from_authorization
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+# Seconds between lookups while another worker processes the same key
+POLL_INTERVAL = 0.2
+
+
+class CachedResponse(NamedTuple):
+    fingerprint: str
+    status: int
+    headers: list  # [(name, value), ...] as bytes
+    body: bytes
+    expires_at: datetime
+
+
+# Hash of everything that identifies the request; multipart boundaries are left out since clients regenerate them on retry
+def request_fingerprint(method: str, path: str, query_string: bytes, content_type: str, body: bytes) -> str:
+    if content_type.startswith("multipart/") and "boundary=" in content_type:
+        boundary = content_type.split("boundary=", 1)[1].split(";", 1)[0].strip().strip('"')
+        body = body.replace(b"--" + boundary.encode(), b"--")
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query_string):
+        digest.update(part)
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response when a mutating request is retried with the same Idempotency-Key header.
+
+    Keys are scoped per user and stored in Postgres (see app.crud.idempotency) for
+    idempotency_ttl_hours, with the most recent responses also kept in memory. A duplicate
+    arriving while the first request is still running in this worker waits for its result;
+    one running in another worker is polled for up to idempotency_wait_seconds. Reusing a
+    key for a different request is rejected with 422. Server errors are not stored, so the
+    request can be retried.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._cache = OrderedDict()  # (user_id, key) -> CachedResponse
+        self._in_flight = {}  # (user_id, key) -> (fingerprint, future resolved with a CachedResponse or None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(IDEMPOTENCY_HEADER)
+        user_id = get_user_id_from_authorization(headers.get(b"authorization", b"").decode("latin-1")) if key else None
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+        key = key.decode("latin-1")
+        if len(key) > MAX_KEY_LENGTH:
+            await self._send_error(send, 400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.")
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            # The client went away mid-upload: a partial body must neither run nor be stored under the key
+            return
+        fingerprint = request_fingerprint(
+            scope["method"], scope["path"], scope.get("query_string", b""),
+            headers.get(b"content-type", b"").decode("latin-1"), body
+        )
+        cache_key = (user_id, key)
+
+        while True:
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                await self._replay(send, cached, fingerprint)
+                return
+            in_flight = self._in_flight.get(cache_key)
+            if in_flight is None:
+                break
+            # Coalesce onto the request already running in this worker
+            leader_fingerprint, future = in_flight
+            if leader_fingerprint != fingerprint:
+                await self._send_mismatch(send)
+                return
+            response = await asyncio.shield(future)
+            if response is not None:
+                await self._replay(send, response, fingerprint)
+                return
+            # The first request failed without a response, so this one runs instead
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = (fingerprint, future)
+        response = None
+        try:
+            response = await self._lead(scope, receive, send, user_id, key, fingerprint, body)
+        finally:
+            del self._in_flight[cache_key]
+            future.set_result(response)
+
+    # Handle the first request seen by this worker: replay a stored response, or claim the key and run the request
+    async def _lead(self, scope, receive, send, user_id: int, key: str, fingerprint: str, body: bytes) -> Optional[CachedResponse]:
+        deadline = time.monotonic() + settings.idempotency_wait_seconds
+        while True:
+            stored = await run_in_threadpool(self._load, user_id, key)
+            if stored is None or stored.expires_at <= datetime.utcnow():
+                if await run_in_threadpool(self._claim, user_id, key, fingerprint):
+                    return await self._run(scope, receive, send, user_id, key, fingerprint, body)
+            elif stored.fingerprint != fingerprint:
+                await self._send_mismatch(send)
+                return None
+            elif stored.status is not None:
+                self._put_cached((user_id, key), stored)
+                await self._replay(send, stored, fingerprint)
+                return stored
+            if time.monotonic() >= deadline:
+                await self._send_error(send, 409, "A request with this Idempotency-Key is still being processed.")
+                return None
+            await asyncio.sleep(POLL_INTERVAL)
+
+    # Run the request while streaming its response to the client, then store the response
+    async def _run(self, scope, receive, send, user_id: int, key: str, fingerprint: str, body: bytes) -> Optional[CachedResponse]:
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, self._replay_body(receive, body), capture)
+        except BaseException:
+            await run_in_threadpool(self._release, user_id, key, fingerprint)
+            raise
+        if not start or start["status"] >= 500:
+            await run_in_threadpool(self._release, user_id, key, fingerprint)
+            return None
+
+        response_headers = [(name, value) for name, value in start.get("headers", []) if name.lower() != b"set-cookie"]
+        response_body = b"".join(chunks)
+        expires_at = await run_in_threadpool(
+            self._complete, user_id, key, fingerprint, start["status"], response_headers, response_body
+        )
+        if expires_at is None:
+            # Took too long and a retry claimed the key; duplicates of this request waiting here still get the response
+            logger.warning(f"Idempotency key {key!r} of user {user_id} was taken over before its response was stored")
+            return CachedResponse(fingerprint, start["status"], response_headers, response_body, datetime.utcnow())
+        response = CachedResponse(fingerprint, start["status"], response_headers, response_body, expires_at)
+        self._put_cached((user_id, key), response)
+        return response
+
+    def _get_cached(self, cache_key) -> Optional[CachedResponse]:
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return None
+        if cached.expires_at <= datetime.utcnow():
+            del self._cache[cache_key]
+            return None
+        self._cache.move_to_end(cache_key)
+        return cached
+
+    def _put_cached(self, cache_key, response: CachedResponse):
+        self._cache[cache_key] = response
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > settings.idempotency_cache_size:
+            self._cache.popitem(last=False)
+
+    # Database access (run in the threadpool with a short-lived session)
+
+    @staticmethod
+    def _load(user_id: int, key: str) -> Optional[CachedResponse]:
+        with Session(engine) as db:
+            row = get_idempotency_key(db, user_id, key)
+            if row is None:
+                return None
+            headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.response_headers or []]
+            return CachedResponse(row.fingerprint, row.response_status, headers, row.response_body or b"", row.expires_at)
+
+    @staticmethod
+    def _claim(user_id: int, key: str, fingerprint: str) -> bool:
+        with Session(engine) as db:
+            return claim_idempotency_key(db, user_id, key, fingerprint)
+
+    @staticmethod
+    def _complete(user_id: int, key: str, fingerprint: str, status: int, headers: list, body: bytes) -> Optional[datetime]:
+        stored_headers = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers]
+        with Session(engine) as db:
+            return complete_idempotency_key(db, user_id, key, fingerprint, status, stored_headers, body)
+
+    @staticmethod
+    def _release(user_id: int, key: str, fingerprint: str):
+        try:
+            with Session(engine) as db:
+                release_idempotency_key(db, user_id, key, fingerprint)
+        except Exception as e:
+            # The claim expires after idempotency_lock_seconds anyway
+            logger.error(f"Failed to release idempotency key {key!r} of user {user_id}: {str(e)}")
+
+    # ASGI helpers
+
+    # The complete request body, or None if the client disconnected before sending all of it
+    @staticmethod
+    async def _read_body(receive) -> Optional[bytes]:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    def _replay_body(receive, body: bytes):
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
+
+    async def _replay(self, send, response: CachedResponse, fingerprint: str):
+        if response.fingerprint != fingerprint:
+            await self._send_mismatch(send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + [(REPLAYED_HEADER, b"true")],
+        })
+        await send({"type": "http.response.body", "body": response.body})
+
+    async def _send_mismatch(self, send):
+        await self._send_error(send, 422, "Idempotency-Key was already used for a different request.")
+
+    @staticmethod
+    async def _send_error(send, status: int, detail: str):
+        body = orjson.dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -4,7 +4,10 @@ import os
 import io
 from .minio_status_codes import MinIOStatusCodes
 from minio.commonconfig import CopySource
+from minio.datatypes import Part
+from minio.deleteobjects import DeleteObject
 from app.core.config import settings
+from app.core.storage import get_minio_object_url  # noqa: F401  (re-exported for existing callers)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,6 +34,17 @@ def setup_minio_bucket():
         logger.error(f"Error checking/creating bucket: {str(e)}")
         raise Exception(f"Setup error: {MinIOStatusCodes.get_status_description(error_code)}")
 
+# Overwrite the reference count stored in an object's metadata
+def set_object_ref_count(bucket_name: str, object_name: str, ref_count: int):
+    copy_source = CopySource(bucket_name, object_name)
+    minio_client.copy_object(
+        bucket_name,
+        object_name,
+        copy_source,
+        metadata={"x-amz-meta-ref-count": str(ref_count)},
+        metadata_directive="REPLACE"
+    )
+
 # Upload a file to MinIO with reference count handling
 def upload_to_minio(file_data: bytes, bucket_name: str, object_name: str):
     try:
@@ -41,14 +55,7 @@ def upload_to_minio(file_data: bytes, bucket_name: str, object_name: str):
             ref_count = int(stat.metadata.get("x-amz-meta-ref-count", 0)) + 1
 
             # Update the metadata with the new reference count
-            copy_source = CopySource(bucket_name, object_name)
-            minio_client.copy_object(
-                bucket_name,
-                object_name,
-                copy_source,
-                metadata={"x-amz-meta-ref-count": str(ref_count)},
-                metadata_directive="REPLACE"
-            )
+            set_object_ref_count(bucket_name, object_name, ref_count)
             logger.info(f"Reference count updated to {ref_count} for object {object_name}")
             return MinIOStatusCodes.OBJECT_ALREADY_EXIST
         except S3Error as e:
@@ -66,9 +73,24 @@ def upload_to_minio(file_data: bytes, bucket_name: str, object_name: str):
         logger.error(f"Upload failed: {str(e)}")
         return MinIOStatusCodes.FAILURE
 
-# Generate MinIO object URL
-def get_minio_object_url(bucket_name: str, object_name: str) -> str:
-    return f"{settings.minio_endpoint}/{bucket_name}/{object_name}"
+# Server-side copy of an object to a new key, starting the copy with a reference count of 1
+def copy_object_to(bucket_name: str, source_name: str, target_name: str):
+    minio_client.copy_object(
+        bucket_name,
+        target_name,
+        CopySource(bucket_name, source_name),
+        metadata={"x-amz-meta-ref-count": "1"},
+        metadata_directive="REPLACE"
+    )
+
+# Remove many objects with batched DeleteObjects requests, returning the names that failed
+def remove_objects_batch(bucket_name: str, object_names: list) -> list:
+    errors = minio_client.remove_objects(bucket_name, (DeleteObject(name) for name in object_names))
+    failed = []
+    for error in errors:  # remove_objects is lazy: the requests are sent while iterating
+        logger.error(f"Failed to delete object '{error.name}' from bucket '{bucket_name}': {error.message}")
+        failed.append(error.name)
+    return failed
 
 # Delete an object reference from MinIO
 def delete_from_minio(bucket_name: str, object_name: str) -> int:
@@ -89,14 +111,7 @@ def delete_from_minio(bucket_name: str, object_name: str) -> int:
 
             logger.info(f"Deleting object {object_name} from bucket {bucket_name}")
             # Update the metadata with the decremented reference count
-            copy_source = CopySource(bucket_name, object_name)
-            minio_client.copy_object(
-                bucket_name,
-                object_name,
-                copy_source,
-                metadata={"x-amz-meta-ref-count": str(ref_count)},
-                metadata_directive="REPLACE"
-            )
+            set_object_ref_count(bucket_name, object_name, ref_count)
             logger.info(f"Reference count decremented to {ref_count} for object {object_name}")
             return MinIOStatusCodes.SUCCESS
         else:
@@ -110,4 +125,62 @@ def delete_from_minio(bucket_name: str, object_name: str) -> int:
             return MinIOStatusCodes.OBJECT_NOT_FOUND
         else:
             logger.error(f"Failed to delete object '{object_name}' from bucket '{bucket_name}': {str(e)}")
-            return MinIOStatusCodes.FAILURE
\ No newline at end of file
+            return MinIOStatusCodes.FAILURE
+
+# The multipart helpers below wrap private minio-py methods: the public client only exposes multipart uploads
+# inside put_object, which can't be resumed across requests. Their signatures were checked against minio 7.2.x,
+# which requirements.txt pins; re-check them before raising the pin.
+
+# Start a multipart upload for a resumable upload session and return its upload id
+def create_multipart_upload(bucket_name: str, object_name: str) -> str:
+    return minio_client._create_multipart_upload(bucket_name, object_name, {"x-amz-meta-ref-count": "1"})
+
+# Upload one part of a multipart upload and return its ETag
+def upload_part(bucket_name: str, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+    return minio_client._upload_part(bucket_name, object_name, data, None, upload_id, part_number)
+
+# Complete a multipart upload, keeping the reference count if the object already existed
+def complete_multipart_upload(bucket_name: str, object_name: str, upload_id: str, parts: list) -> int:
+    try:
+        try:
+            stat = minio_client.stat_object(bucket_name, object_name)
+            ref_count = int(stat.metadata.get("x-amz-meta-ref-count", 0)) + 1
+        except S3Error as e:
+            if e.code != "NoSuchKey":
+                raise
+            ref_count = None
+
+        try:
+            minio_client._complete_multipart_upload(
+                bucket_name,
+                object_name,
+                upload_id,
+                [Part(part["part_number"], part["etag"]) for part in parts],
+            )
+        except S3Error as e:
+            if e.code != "NoSuchUpload" or ref_count is None:
+                raise
+            # An earlier attempt completed it (and counted the reference) but its caller failed afterwards
+            logger.info(f"Multipart upload of '{object_name}' was already completed")
+            return MinIOStatusCodes.OBJECT_ALREADY_EXIST
+        if ref_count is None:
+            logger.info(f"Multipart upload completed to {bucket_name}/{object_name} with ref-count 1")
+            return MinIOStatusCodes.SUCCESS
+
+        set_object_ref_count(bucket_name, object_name, ref_count)
+        logger.info(f"Multipart upload replaced {object_name}, reference count updated to {ref_count}")
+        return MinIOStatusCodes.OBJECT_ALREADY_EXIST
+    except S3Error as e:
+        logger.error(f"Completing multipart upload of '{object_name}' failed: {str(e)}")
+        return MinIOStatusCodes.FAILURE
+
+# Abort a multipart upload and discard its parts
+def abort_multipart_upload(bucket_name: str, object_name: str, upload_id: str) -> int:
+    try:
+        minio_client._abort_multipart_upload(bucket_name, object_name, upload_id)
+        return MinIOStatusCodes.SUCCESS
+    except S3Error as e:
+        if e.code == "NoSuchUpload":
+            return MinIOStatusCodes.OBJECT_NOT_FOUND
+        logger.error(f"Aborting multipart upload of '{object_name}' failed: {str(e)}")
+        return MinIOStatusCodes.FAILURE
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Iterable, Optional, Set
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel carrying group events between uvicorn workers
+CHANNEL = "photo_events"
+
+# Event types (kept short: every subscriber of the group receives the payload)
+PHOTO_ADDED = "photo_added"
+PHOTO_DELETED = "photo_deleted"
+MEMBER_ADDED = "member_added"
+MEMBER_REMOVED = "member_removed"
+GROUP_DELETED = "group_deleted"
+RESYNC = "resync"
+
+# Queue a group event with NOTIFY. Postgres delivers it only if the surrounding transaction
+# commits, so call this before db.commit().
+def publish_event(db: Session, event_type: str, group_id: int, **fields):
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    payload = {"t": event_type, "g": group_id, "ts": int(time.time() * 1000), **fields}
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": json.dumps(payload)})
+
+
+class Subscriber:
+    """
+    One connected client. Events are buffered in a bounded queue; if the client
+    falls behind, the backlog is dropped and replaced by a single resync event
+    telling it to re-fetch its listings.
+    """
+
+    def __init__(self, user_id: int, group_ids: Iterable[int], queue_size: int):
+        self.user_id = user_id
+        self.group_ids: Set[int] = set(group_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"t": RESYNC, "ts": event.get("ts")})
+
+    async def next_event(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """Fans events received by this process out to its connected subscribers."""
+
+    def __init__(self):
+        self._by_group: Dict[int, Set[Subscriber]] = {}
+        self._by_user: Dict[int, Set[Subscriber]] = {}
+
+    def subscribe(self, user_id: int, group_ids: Iterable[int]) -> Subscriber:
+        subscriber = Subscriber(user_id, group_ids, settings.events_queue_size)
+        self._by_user.setdefault(user_id, set()).add(subscriber)
+        for group_id in subscriber.group_ids:
+            self._by_group.setdefault(group_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._discard(self._by_user, subscriber.user_id, subscriber)
+        for group_id in subscriber.group_ids:
+            self._discard(self._by_group, group_id, subscriber)
+
+    def dispatch(self, event: dict):
+        group_id = event.get("g")
+        # A new member starts receiving the group's events, including this one
+        if event.get("t") == MEMBER_ADDED:
+            for subscriber in self._by_user.get(event.get("u"), ()):
+                subscriber.group_ids.add(group_id)
+                self._by_group.setdefault(group_id, set()).add(subscriber)
+
+        for subscriber in list(self._by_group.get(group_id, ())):
+            subscriber.offer(event)
+
+        # A removed member (or everyone, for a deleted group) stops receiving them
+        if event.get("t") == MEMBER_REMOVED:
+            leaving = [s for s in self._by_group.get(group_id, ()) if s.user_id == event.get("u")]
+        elif event.get("t") == GROUP_DELETED:
+            leaving = list(self._by_group.get(group_id, ()))
+        else:
+            leaving = []
+        for subscriber in leaving:
+            subscriber.group_ids.discard(group_id)
+            self._discard(self._by_group, group_id, subscriber)
+
+    def broadcast(self, event: dict):
+        for subscribers in list(self._by_user.values()):
+            for subscriber in list(subscribers):
+                subscriber.offer(event)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._by_user.values())
+
+    @staticmethod
+    def _discard(index: dict, key, subscriber: Subscriber):
+        subscribers = index.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del index[key]
+
+
+# The hub of this worker process
+event_hub = EventHub()
+
+
+class PostgresListener:
+    """Single LISTEN connection per process, reconnecting with backoff if it drops."""
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            self.hub.dispatch(json.loads(payload))
+        except ValueError:
+            logger.warning(f"Ignoring malformed event payload: {payload}")
+
+    async def _run(self):
+        # asyncpg takes a plain libpq URL, without the SQLAlchemy driver suffix
+        dsn = make_url(str(settings.database_url)).set(drivername="postgresql").render_as_string(hide_password=False)
+        backoff = 1
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+                try:
+                    await connection.add_listener(CHANNEL, self._on_notification)
+                    logger.info(f"Listening for events on channel '{CHANNEL}'")
+                    backoff = 1
+                    while not connection.is_closed():
+                        await asyncio.sleep(settings.events_keepalive_seconds)
+                        await connection.execute("SELECT 1")
+                finally:
+                    await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event listener connection lost: {str(e)}")
+            # Events committed while disconnected are lost, so ask every client to resync
+            self.hub.broadcast({"t": RESYNC, "ts": int(time.time() * 1000)})
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+event_listener = PostgresListener(event_hub)